@@ -0,0 +1,79 @@
+# app/admin_ui.py
+import streamlit as st
+import pandas as pd
+
+from perf_metrics import metrics_snapshot, reset_metrics
+from record_cache import record_cache_stats
+from replica import replica_status
+from config import OUTBOX_MAX_ATTEMPTS
+from db_outbox import outbox_status, dead_outbox_entries, retry_dead_outbox_entries
+
+def performance_page():
+    st.header("Performance")
+    st.write("Latency of every Supabase call, PDF render and ZIP build since the app started (all sessions).")
+
+    rows = metrics_snapshot()
+    if rows:
+        df = pd.DataFrame(rows).set_index("metric")
+        st.dataframe(df, use_container_width=True)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Calls", f"{int(df['count'].sum()):,}")
+        with col2:
+            st.metric("Errors", f"{int(df['errors'].sum()):,}")
+        with col3:
+            slowest = df["p99_ms"].idxmax()
+            st.metric("Slowest p99", f"{df.loc[slowest, 'p99_ms']:,.0f} ms", help=slowest)
+    else:
+        st.info("No calls recorded yet. Use the other pages and come back.")
+
+    st.subheader("Caches and queues")
+    cache = record_cache_stats()
+    outbox = outbox_status()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Receipt lookup hit ratio", f"{cache['hit_ratio']:.0%}", help=f"{cache['hits']} hits, {cache['misses']} misses")
+    with col2:
+        st.metric("Outbox pending", outbox["pending"])
+    with col3:
+        st.metric("Outbox retrying", outbox["failing"])
+
+    if outbox["dead"]:
+        st.warning(f"{outbox['dead']} outbox write(s) failed {OUTBOX_MAX_ATTEMPTS} times and are no longer retried.")
+        dead = pd.DataFrame(dead_outbox_entries())
+        dead["queued_at"] = pd.to_datetime(dead["queued_at"], unit="s")
+        st.dataframe(dead, use_container_width=True, hide_index=True)
+        if st.button("🔁 Retry Dead Writes"):
+            retry_dead_outbox_entries()
+            st.rerun()
+
+    replica = replica_status()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Replica rows", f"{replica['rows']:,}")
+    with col2:
+        age = replica["sync_age_seconds"]
+        st.metric("Replica last synced", "never" if age is None else f"{age:,.0f} s ago")
+    with col3:
+        st.metric("Reads served from", "replica" if replica["fresh"] else "Supabase")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Refresh"):
+            st.rerun()
+    with col2:
+        if st.button("🧹 Reset Metrics"):
+            reset_metrics()
+            st.rerun()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("← Back to Mode Selection"):
+            st.session_state['mode'] = None
+            st.rerun()
+    with col2:
+        if st.button("← Back to Main Dashboard"):
+            st.session_state['mode'] = None
+            st.session_state['active_section'] = None
+            st.rerun()
@@ -0,0 +1,71 @@
+# app/amount_words.py
+from functools import lru_cache
+from typing import Iterable, List
+
+# Same wording as num2words(n, lang='en_IN'), which the receipts used before.
+_ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+# Largest value supported, matching num2words' en_IN limit (< 100 crore x 100).
+MAX_AMOUNT = 10 ** 10 - 1
+
+def _below_hundred(n: int) -> str:
+    if n < 20:
+        return _ONES[n]
+    tens, ones = divmod(n, 10)
+    return _TENS[tens] if ones == 0 else f"{_TENS[tens]}-{_ONES[ones]}"
+
+def _below_thousand(n: int) -> str:
+    hundreds, rest = divmod(n, 100)
+    if hundreds == 0:
+        return _below_hundred(rest)
+    if rest == 0:
+        return f"{_ONES[hundreds]} hundred"
+    return f"{_ONES[hundreds]} hundred and {_below_hundred(rest)}"
+
+@lru_cache(maxsize=4096)
+def amount_to_words(amount: int) -> str:
+    """
+    Converts a whole rupee amount to words in the Indian numbering system
+    (thousand, lakh, crore), e.g. 150000 -> "one lakh, fifty thousand".
+    Results are memoized, since donation amounts repeat heavily.
+    """
+    if amount < 0:
+        return f"minus {amount_to_words(-amount)}"
+    if amount > MAX_AMOUNT:
+        raise OverflowError(f"abs({amount}) must be less than {MAX_AMOUNT + 1}.")
+    if amount < 100:
+        return _below_hundred(amount)
+
+    crores, rest = divmod(amount, 10 ** 7)
+    lakhs, rest = divmod(rest, 10 ** 5)
+    thousands, rest = divmod(rest, 1000)
+    hundreds, tail = divmod(rest, 100)
+
+    parts = []
+    if crores:
+        parts.append(f"{_below_thousand(crores)} crore")
+    if lakhs:
+        parts.append(f"{_below_hundred(lakhs)} lakh")
+    if thousands:
+        parts.append(f"{_below_hundred(thousands)} thousand")
+    if hundreds:
+        parts.append(f"{_ONES[hundreds]} hundred")
+
+    words = ", ".join(parts)
+    if tail:
+        words = f"{words} and {_below_hundred(tail)}"
+    return words
+
+def amounts_to_words(amounts: Iterable) -> List[str]:
+    """
+    Converts a whole column of amounts at once. Each distinct amount is
+    converted only once; values are truncated to whole rupees like int().
+    """
+    amounts = [int(float(a)) for a in amounts]
+    words = {a: amount_to_words(a) for a in set(amounts)}
+    return [words[a] for a in amounts]
@@ -8,6 +8,26 @@ import streamlit as st
 SUPABASE_URL = st.secrets["SUPABASE_URL"]
 SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
 
+# Rows sent per bulk donor-insert RPC during Excel uploads.
+DONOR_RPC_CHUNK_SIZE = int(st.secrets.get("DONOR_RPC_CHUNK_SIZE", 200))
+# Receipts flagged as generated per bulk mark-report RPC.
+FLAG_RPC_CHUNK_SIZE = int(st.secrets.get("FLAG_RPC_CHUNK_SIZE", 500))
+
+# Direct PostgREST calls: timeouts in seconds and retries (with exponential
+# backoff) on connection errors and 5xx responses.
+REST_CONNECT_TIMEOUT = float(st.secrets.get("REST_CONNECT_TIMEOUT", 5))
+REST_READ_TIMEOUT = float(st.secrets.get("REST_READ_TIMEOUT", 30))
+REST_MAX_RETRIES = int(st.secrets.get("REST_MAX_RETRIES", 3))
+REST_BACKOFF_FACTOR = float(st.secrets.get("REST_BACKOFF_FACTOR", 0.5))
+
+# Requests kept in flight at once by the async client's batch helpers.
+SUPABASE_ASYNC_CONCURRENCY = int(st.secrets.get("SUPABASE_ASYNC_CONCURRENCY", 8))
+
+# Rows per page when streaming missing receipts, and the most the recovery
+# page loads into the selection list at once.
+MISSING_RECEIPTS_PAGE_SIZE = int(st.secrets.get("MISSING_RECEIPTS_PAGE_SIZE", 500))
+RECOVERY_MAX_RECORDS = int(st.secrets.get("RECOVERY_MAX_RECORDS", 2000))
+
 _supabase_client_instance: Client = None
 
 def get_supabase_client() -> Client:
@@ -34,9 +54,68 @@ FONT_PATH = os.path.join(ASSETS_DIR_STREAMLIT, "Poppins-Regular.ttf")
 FONT_BOLD_PATH = os.path.join(ASSETS_DIR_STREAMLIT, "Poppins-Bold.ttf")
 
 # --- PDF Output Configuration ---
-BASE_PDF_OUTPUT_DIR = "ht_donation_receipt"
+BASE_PDF_OUTPUT_DIR = os.path.abspath(st.secrets.get("PDF_OUTPUT_DIR", "ht_donation_receipt"))
 os.makedirs(BASE_PDF_OUTPUT_DIR, exist_ok=True)
 
+# Disk quota for stored receipts, in bytes. Least recently used session
+# folders are deleted once it is exceeded (0 disables eviction).
+PDF_STORAGE_QUOTA_BYTES = int(st.secrets.get("PDF_STORAGE_QUOTA_BYTES", 2 * 1024 ** 3))
+# Sessions used within this many seconds are never evicted, so a batch still
+# being rendered or downloaded in another session keeps its files.
+PDF_STORAGE_GRACE_SECONDS = float(st.secrets.get("PDF_STORAGE_GRACE_SECONDS", 3600))
+
+# Worker processes used to render batches of receipts in parallel.
+PDF_RENDER_WORKERS = int(st.secrets.get("PDF_RENDER_WORKERS", os.cpu_count() or 1))
+
+# Upper bound on the size of a single receipt PDF, in bytes (0 disables the check).
+RECEIPT_PDF_BYTE_BUDGET = int(st.secrets.get("RECEIPT_PDF_BYTE_BUDGET", 150_000))
+
+# Memory limit for the process-wide cache of rendered receipt PDFs, in bytes.
+RENDER_CACHE_MAX_BYTES = int(st.secrets.get("RENDER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Background outbox for DB writes that failed or were deferred after a PDF was
+# generated: poll interval, retry backoff (doubling per attempt, capped) and
+# entries sent per drain.
+OUTBOX_POLL_SECONDS = float(st.secrets.get("OUTBOX_POLL_SECONDS", 15))
+OUTBOX_BASE_BACKOFF_SECONDS = float(st.secrets.get("OUTBOX_BASE_BACKOFF_SECONDS", 5))
+OUTBOX_MAX_BACKOFF_SECONDS = float(st.secrets.get("OUTBOX_MAX_BACKOFF_SECONDS", 3600))
+OUTBOX_BATCH_SIZE = int(st.secrets.get("OUTBOX_BATCH_SIZE", 500))
+# Attempts before an outbox entry stops being retried and is listed as dead on
+# the Performance page (about a day with the default backoff).
+OUTBOX_MAX_ATTEMPTS = int(st.secrets.get("OUTBOX_MAX_ATTEMPTS", 30))
+
+# Known donations from this many days back are indexed locally so uploads can
+# skip duplicates without a round trip; the index is reloaded after the refresh interval.
+DUPLICATE_INDEX_SEED_DAYS = int(st.secrets.get("DUPLICATE_INDEX_SEED_DAYS", 180))
+DUPLICATE_INDEX_REFRESH_SECONDS = float(st.secrets.get("DUPLICATE_INDEX_REFRESH_SECONDS", 900))
+
+# Receipt lookups (get_receipt_by_number) are cached process-wide for this many
+# seconds, up to this many records. A TTL of 0 disables the cache.
+RECORD_CACHE_TTL_SECONDS = float(st.secrets.get("RECORD_CACHE_TTL_SECONDS", 300))
+RECORD_CACHE_MAX_ENTRIES = int(st.secrets.get("RECORD_CACHE_MAX_ENTRIES", 1024))
+
+# The Update Record page searches an in-memory index of all donations. It is
+# reloaded in the background once older than this; edits made here apply at once.
+DONOR_SEARCH_REFRESH_SECONDS = float(st.secrets.get("DONOR_SEARCH_REFRESH_SECONDS", 3600))
+DONOR_SEARCH_RESULT_LIMIT = int(st.secrets.get("DONOR_SEARCH_RESULT_LIMIT", 20))
+DONOR_SEARCH_PAGE_SIZE = int(st.secrets.get("DONOR_SEARCH_PAGE_SIZE", 1000))
+
+# Reads are served from a local SQLite replica of Hope_Trust while it is fresh.
+# New rows are pulled every REPLICA_SYNC_SECONDS; the whole table is reloaded
+# every REPLICA_FULL_SYNC_SECONDS to pick up edits made outside this app.
+# A replica not synced within REPLICA_MAX_STALENESS_SECONDS is bypassed.
+REPLICA_SYNC_SECONDS = float(st.secrets.get("REPLICA_SYNC_SECONDS", 60))
+REPLICA_MAX_STALENESS_SECONDS = float(st.secrets.get("REPLICA_MAX_STALENESS_SECONDS", 300))
+REPLICA_FULL_SYNC_SECONDS = float(st.secrets.get("REPLICA_FULL_SYNC_SECONDS", 86400))
+REPLICA_PAGE_SIZE = int(st.secrets.get("REPLICA_PAGE_SIZE", 1000))
+
+# Excel uploads are read in chunks of this many rows, parsed this many chunks
+# ahead of validation and inserts. EXCEL_READER picks the parser: "auto",
+# "calamine" (needs python-calamine), "openpyxl" or "pandas".
+EXCEL_READER = st.secrets.get("EXCEL_READER", "auto")
+EXCEL_READ_CHUNK_SIZE = int(st.secrets.get("EXCEL_READ_CHUNK_SIZE", 2000))
+EXCEL_READ_PREFETCH_CHUNKS = int(st.secrets.get("EXCEL_READ_PREFETCH_CHUNKS", 2))
+
 # --- UI Color Palette ---
 UI_PRIMARY_COLOR = "#FFD100"
 UI_PRIMARY_COLOR_DARK = "#CCA700"
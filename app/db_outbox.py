@@ -0,0 +1,211 @@
+# app/db_outbox.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Tuple
+
+from config import (get_supabase_client, BASE_PDF_OUTPUT_DIR, OUTBOX_POLL_SECONDS, OUTBOX_BASE_BACKOFF_SECONDS,
+                    OUTBOX_MAX_BACKOFF_SECONDS, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS)
+from supabase_client import set_receipt_generated_flags, fetch_reported_receipt_nos
+from perf_metrics import timed
+
+# Durable queue of database writes that must happen after a PDF exists, so a
+# Supabase outage never loses them. Each entry is keyed by (kind, key): queuing
+# the same write twice keeps one entry, and every handler is safe to repeat,
+# so an entry retried after a crash mid-drain does no harm. An entry that has
+# failed OUTBOX_MAX_ATTEMPTS times is dead: it stays in the table for the
+# Performance page but is no longer sent until retried or queued again.
+#
+# Kinds:
+#   mark_report   key = receipt number, drained in bulk via set_receipt_generated_flags
+#   rpc           key = caller-chosen idempotency key, payload = {"function", "params"}
+OUTBOX_PATH = os.path.join(BASE_PDF_OUTPUT_DIR, "db_outbox.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt);
+"""
+
+_drain_lock = threading.Lock()
+_drainer = None
+_drainer_lock = threading.Lock()
+_wake = threading.Event()
+
+@contextmanager
+def _outbox():
+    """Opens the outbox, commits on success and always closes the connection."""
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def _enqueue(entries: Iterable[Tuple[str, str, Dict[str, Any]]]):
+    """Queues (kind, key, payload) entries. A newer payload replaces a pending one for the same key."""
+    now = time.time()
+    rows = [(kind, key, json.dumps(payload), now, now) for kind, key, payload in entries]
+    if not rows:
+        return
+    with _outbox() as conn:
+        conn.executemany(
+            "INSERT INTO outbox (kind, key, payload, next_attempt, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (kind, key) DO UPDATE SET payload = excluded.payload, attempts = 0, "
+            "next_attempt = excluded.next_attempt, last_error = NULL",
+            rows
+        )
+    start_outbox_drainer()
+    _wake.set()
+
+def enqueue_report_flags(receipt_nos: List[str]):
+    """Queues 'report' flag updates. They are sent in the background, in bulk."""
+    _enqueue(("mark_report", receipt_no.strip(), {}) for receipt_no in receipt_nos)
+
+def enqueue_rpc(function: str, params: Dict[str, Any], key: str):
+    """
+    Queues an RPC call. `key` identifies the write (e.g. the receipt number):
+    queuing another call with the same key replaces the pending one.
+    The RPC itself must be safe to run more than once.
+    """
+    _enqueue([("rpc", f"{function}:{key}", {"function": function, "params": params})])
+
+def _backoff(attempts: int) -> float:
+    return min(OUTBOX_MAX_BACKOFF_SECONDS, OUTBOX_BASE_BACKOFF_SECONDS * 2 ** attempts)
+
+def _send_rpc(payload: Dict[str, Any]) -> Tuple[bool, str]:
+    try:
+        with timed(f"rpc.{payload['function']}"):
+            get_supabase_client().rpc(payload["function"], payload["params"]).execute()
+        return True, ""
+    except Exception as e:
+        return False, str(e)
+
+def _send_flags(receipt_nos: List[str]) -> Dict[str, bool]:
+    """Sets the flags; receipts already reported in Supabase count as sent."""
+    results = set_receipt_generated_flags(receipt_nos)
+    unsent = [receipt_no for receipt_no in receipt_nos if not results.get(receipt_no)]
+    if unsent:
+        try:
+            reported = fetch_reported_receipt_nos(unsent)
+            results.update((receipt_no, True) for receipt_no in unsent if receipt_no in reported)
+        except Exception as e:
+            print(f"⚠️ Could not check which receipts are already reported: {e}")
+    return results
+
+def drain_outbox() -> Dict[str, int]:
+    """
+    Sends every due entry once. Successful entries are deleted; failed ones are
+    rescheduled with exponential backoff, or left dead after OUTBOX_MAX_ATTEMPTS.
+    Returns counts of sent, failed and newly dead entries.
+    """
+    sent, failed, dead = 0, 0, 0
+    with _drain_lock:
+        with _outbox() as conn:
+            due = conn.execute(
+                "SELECT kind, key, payload, attempts FROM outbox WHERE next_attempt <= ? AND attempts < ? "
+                "ORDER BY created_at LIMIT ?", (time.time(), OUTBOX_MAX_ATTEMPTS, OUTBOX_BATCH_SIZE)
+            ).fetchall()
+        if not due:
+            return {"sent": 0, "failed": 0, "dead": 0}
+
+        outcomes: List[Tuple[str, str, str, int, bool, str]] = []
+        flags = [(key, payload, attempts) for kind, key, payload, attempts in due if kind == "mark_report"]
+        if flags:
+            flag_results = _send_flags([key for key, _, _ in flags])
+            outcomes.extend(("mark_report", key, payload, attempts, flag_results.get(key, False), "flag update failed")
+                            for key, payload, attempts in flags)
+        for kind, key, payload, attempts in due:
+            if kind == "rpc":
+                ok, error = _send_rpc(json.loads(payload))
+                outcomes.append((kind, key, payload, attempts, ok, error))
+
+        # Matching on payload leaves alone any entry that was replaced while it was being sent.
+        now = time.time()
+        with _outbox() as conn:
+            for kind, key, payload, attempts, ok, error in outcomes:
+                if ok:
+                    conn.execute("DELETE FROM outbox WHERE kind = ? AND key = ? AND payload = ?", (kind, key, payload))
+                    sent += 1
+                else:
+                    conn.execute(
+                        "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? "
+                        "WHERE kind = ? AND key = ? AND payload = ?",
+                        (attempts + 1, now + _backoff(attempts), error, kind, key, payload)
+                    )
+                    failed += 1
+                    if attempts + 1 >= OUTBOX_MAX_ATTEMPTS:
+                        dead += 1
+                        print(f"💀 Outbox entry {kind} {key} gave up after {attempts + 1} attempts: {error}")
+    if sent or failed:
+        print(f"📤 Outbox drained: {sent} sent, {failed} failed" + (" (will retry)." if failed > dead else "."))
+    return {"sent": sent, "failed": failed, "dead": dead}
+
+def outbox_status() -> Dict[str, int]:
+    """
+    Returns the number of pending entries, how many of them have already failed
+    at least once, and the number of dead entries (not counted as pending).
+    """
+    with _outbox() as conn:
+        pending, failing, dead = conn.execute(
+            "SELECT COALESCE(SUM(attempts < ?), 0), COALESCE(SUM(attempts > 0 AND attempts < ?), 0), "
+            "COALESCE(SUM(attempts >= ?), 0) FROM outbox",
+            (OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_ATTEMPTS)
+        ).fetchone()
+    return {"pending": pending, "failing": failing, "dead": dead}
+
+def dead_outbox_entries(limit: int = 100) -> List[Dict[str, Any]]:
+    """Lists dead entries, oldest first, with their last error."""
+    with _outbox() as conn:
+        rows = conn.execute(
+            "SELECT kind, key, attempts, last_error, created_at FROM outbox WHERE attempts >= ? "
+            "ORDER BY created_at LIMIT ?", (OUTBOX_MAX_ATTEMPTS, limit)
+        ).fetchall()
+    return [
+        {"kind": kind, "key": key, "attempts": attempts, "last_error": last_error, "queued_at": created_at}
+        for kind, key, attempts, last_error, created_at in rows
+    ]
+
+def retry_dead_outbox_entries() -> int:
+    """Gives every dead entry a fresh set of attempts. Returns how many were revived."""
+    with _outbox() as conn:
+        revived = conn.execute(
+            "UPDATE outbox SET attempts = 0, next_attempt = ? WHERE attempts >= ?", (time.time(), OUTBOX_MAX_ATTEMPTS)
+        ).rowcount
+    if revived:
+        start_outbox_drainer()
+        _wake.set()
+    return revived
+
+def _drain_forever():
+    while True:
+        _wake.clear()
+        try:
+            # Keep going while full batches come back, then wait for the next poll.
+            while drain_outbox()["sent"] >= OUTBOX_BATCH_SIZE:
+                pass
+        except Exception as e:
+            print(f"❌ Outbox drain failed: {e}")
+        _wake.wait(OUTBOX_POLL_SECONDS)
+
+def start_outbox_drainer():
+    """Starts the background drainer thread once per process."""
+    global _drainer
+    with _drainer_lock:
+        if _drainer is None or not _drainer.is_alive():
+            _drainer = threading.Thread(target=_drain_forever, name="db-outbox-drainer", daemon=True)
+            _drainer.start()
@@ -0,0 +1,225 @@
+# app/donor_search.py
+import bisect
+import heapq
+import re
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import DONOR_SEARCH_REFRESH_SECONDS
+from reload_journal import ReloadJournal
+
+# Process-wide, in-memory search over donations for the Update Record page.
+#
+#   * Every word of name and address, the PAN, receipt number, whole-rupee amount
+#     and date (YYYY-MM-DD and DD-MM-YYYY) is a token; query words match tokens
+#     by prefix through a sorted token list (type-ahead).
+#   * Name and address are also split into trigrams, so misspelt words still
+#     find candidates (fuzzy).
+#
+# Postings are compact arrays of document ids. Edited or re-added donations are
+# tombstoned and appended, and a periodic full reload compacts the index.
+_WORD = re.compile(r"[A-Z0-9]+")
+# Query words keep receipt numbers (ONL-000123) and dates (2024-03-15, 15.03.24,
+# partial 2024-03) in one piece.
+_QUERY_WORD = re.compile(r"[A-Z]+-\d+|\d{1,4}(?:[-.]\d{1,4}){1,2}|[A-Z0-9]+")
+# Single characters are matched exactly only; as prefixes they match nearly everything.
+_MIN_PREFIX_LENGTH = 2
+# Trigrams found in more documents than this are too common to rank with.
+_MAX_TRIGRAM_SHARE = 0.2
+
+def _normalize(text: Any) -> str:
+    return str(text or "").upper()
+
+def _trigrams(text: str) -> set:
+    grams = set()
+    for word in _WORD.findall(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _date_tokens(value: str) -> List[str]:
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        year, month, day = value.split("-")
+        return [value, f"{day}-{month}-{year}", f"{day}.{month}.{year[2:]}"]
+    return [value] if value else []
+
+class DonorSearchIndex:
+    def __init__(self):
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._doc_by_receipt: Dict[str, int] = {}
+        self._token_docs: Dict[str, array] = {}
+        self._sorted_tokens: List[str] = []
+        self._tokens_unsorted = False
+        self._trigram_docs: Dict[str, array] = {}
+        self._live = 0
+        self._lock = threading.RLock()
+        self.loaded_at = 0.0
+
+    def __len__(self):
+        return self._live
+
+    def _tokens(self, doc: Dict[str, Any]) -> set:
+        tokens = set(_WORD.findall(f"{doc['name']} {doc['address']}"))
+        tokens.update(t for t in (doc["pan"], doc["receipt_no"]) if t)
+        try:
+            tokens.add(str(int(float(doc["amount"]))))
+        except (TypeError, ValueError):
+            pass
+        tokens.update(_date_tokens(doc["date"]))
+        return tokens
+
+    def add(self, row: Dict[str, Any]):
+        """Adds or replaces a donation (dict with receipt_no, name, pan, address, amount, date)."""
+        receipt_no = _normalize(row.get("receipt_no")).strip()
+        if not receipt_no:
+            return
+        doc = {
+            "receipt_no": receipt_no,
+            "name": _normalize(row.get("name")),
+            "pan": _normalize(row.get("pan")).strip(),
+            "address": _normalize(row.get("address")),
+            "amount": row.get("amount"),
+            "date": str(row.get("date") or "")[:10],
+        }
+        with self._lock:
+            self.remove(receipt_no)
+            doc_id = len(self._docs)
+            self._docs.append(doc)
+            self._doc_by_receipt[receipt_no] = doc_id
+            self._live += 1
+            for token in self._tokens(doc):
+                postings = self._token_docs.get(token)
+                if postings is None:
+                    postings = self._token_docs[token] = array("I")
+                    if self._tokens_unsorted or not self._sorted_tokens:
+                        # Bulk load: sorted once by search(); insort would be quadratic.
+                        self._sorted_tokens.append(token)
+                        self._tokens_unsorted = True
+                    else:
+                        bisect.insort(self._sorted_tokens, token)
+                postings.append(doc_id)
+            for gram in _trigrams(f"{doc['name']} {doc['address']}"):
+                self._trigram_docs.setdefault(gram, array("I")).append(doc_id)
+
+    def update(self, receipt_no: str, changes: Dict[str, Any]):
+        """Re-indexes a donation with some fields changed. Unknown receipts are ignored."""
+        with self._lock:
+            doc_id = self._doc_by_receipt.get(_normalize(receipt_no).strip())
+            if doc_id is not None:
+                self.add({**self._docs[doc_id], **changes})
+
+    def remove(self, receipt_no: str):
+        with self._lock:
+            doc_id = self._doc_by_receipt.pop(_normalize(receipt_no).strip(), None)
+            if doc_id is not None:
+                self._docs[doc_id] = None
+                self._live -= 1
+
+    def _sort_tokens(self):
+        if self._tokens_unsorted:
+            self._sorted_tokens.sort()
+            self._tokens_unsorted = False
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` donations ranked by how well they match `query`.
+        Each query word scores 3 for an exact token and 2 for a token prefix. A
+        word matching no token falls back to trigram similarity (up to 1), so
+        typos still find the donor.
+        """
+        words = _QUERY_WORD.findall(_normalize(query))
+        if not words:
+            return []
+        with self._lock:
+            self._sort_tokens()
+            scores: Dict[int, float] = {}
+            for word in words:
+                best: Dict[int, float] = {}
+                if len(word) < _MIN_PREFIX_LENGTH:
+                    candidates = [word] if word in self._token_docs else []
+                else:
+                    start = bisect.bisect_left(self._sorted_tokens, word)
+                    candidates = []
+                    for token in self._sorted_tokens[start:start + 200]:
+                        if not token.startswith(word):
+                            break
+                        candidates.append(token)
+                for token in candidates:
+                    points = 3.0 if token == word else 2.0
+                    for doc_id in self._token_docs[token]:
+                        if best.get(doc_id, 0) < points:
+                            best[doc_id] = points
+                if not candidates and len(word) >= 3:
+                    grams = _trigrams(word)
+                    counts: Dict[int, int] = {}
+                    common_limit = max(1, int(len(self._docs) * _MAX_TRIGRAM_SHARE))
+                    usable = [g for g in grams if 0 < len(self._trigram_docs.get(g, ())) <= common_limit]
+                    for gram in usable:
+                        for doc_id in self._trigram_docs[gram]:
+                            counts[doc_id] = counts.get(doc_id, 0) + 1
+                    threshold = max(2, len(grams) // 2)
+                    for doc_id, hits in counts.items():
+                        if hits >= threshold:
+                            best[doc_id] = hits / len(grams)
+                for doc_id, points in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + points
+
+            ranked = heapq.nlargest(
+                limit,
+                ((score, self._docs[doc_id]["date"], doc_id) for doc_id, score in scores.items()
+                 if self._docs[doc_id] is not None)
+            )
+            return [{**self._docs[doc_id], "score": round(score, 2)} for score, _, doc_id in ranked]
+
+_index = DonorSearchIndex()
+# Changes made while rebuild_donor_search() runs, replayed onto the new index.
+_journal = ReloadJournal(threading.Lock())
+
+def search_donors(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    return _index.search(query, limit)
+
+def index_donation(row: Dict[str, Any]):
+    """Adds a newly inserted donation so it is searchable at once."""
+    with _journal.lock:
+        _journal.record("add", row)
+        _index.add(row)
+
+def update_indexed_donation(receipt_no: str, changes: Dict[str, Any]):
+    """Applies an edit to an indexed donation."""
+    with _journal.lock:
+        _journal.record("update", receipt_no, changes)
+        _index.update(receipt_no, changes)
+
+def donor_search_size() -> int:
+    return len(_index)
+
+def donor_search_needs_reload() -> bool:
+    return time.time() - _index.loaded_at > DONOR_SEARCH_REFRESH_SECONDS
+
+def rebuild_donor_search(rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Builds a fresh index from `rows` and swaps it in; searches keep using the
+    old one until the new one is complete. Returns the number indexed.
+    """
+    def build():
+        index = DonorSearchIndex()
+        for row in rows:
+            index.add(row)
+        index._sort_tokens()
+        return index
+
+    def replay(index, entry):
+        action, *payload = entry
+        if action == "add":
+            index.add(*payload)
+        else:
+            index.update(*payload)
+
+    def swap(index):
+        global _index
+        index.loaded_at = time.time()
+        _index = index
+
+    return len(_journal.rebuild(build, replay, swap))
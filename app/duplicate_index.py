@@ -0,0 +1,104 @@
+# app/duplicate_index.py
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import DUPLICATE_INDEX_REFRESH_SECONDS
+from reload_journal import ReloadJournal
+
+# Process-wide index of known donations keyed the way process_and_generate_receipt
+# detects duplicates: (NAME, PAN, AMOUNT, DATE). It is seeded from recent rows by
+# supabase_client.refresh_duplicate_index() and kept current as inserts succeed,
+# so uploads can skip known duplicates without a round trip. A miss proves
+# nothing (older rows are not loaded); only hits are trusted.
+DonationKey = Tuple[str, str, float, str]
+
+_receipt_by_key: Dict[DonationKey, str] = {}
+_key_by_receipt: Dict[str, DonationKey] = {}
+_seeded_at = 0.0
+_seeded_since: Optional[str] = None
+_lock = threading.Lock()
+# Changes made while seed_duplicate_index() runs, replayed onto the new index.
+_journal = ReloadJournal(_lock)
+
+def donation_key(date: str, name: str, amount: Any, pan: str) -> DonationKey:
+    """Normalizes a donation to its duplicate key. `date` is YYYY-MM-DD."""
+    return (str(name).strip().upper(), str(pan or "").strip().upper(), round(float(amount), 2), str(date)[:10])
+
+def find_duplicate(date: str, name: str, amount: Any, pan: str) -> Optional[str]:
+    """Returns the receipt number of a known identical donation, or None."""
+    with _lock:
+        return _receipt_by_key.get(donation_key(date, name, amount, pan))
+
+def remember_donation(date: str, name: str, amount: Any, pan: str, receipt_no: str):
+    """Records a donation the database has confirmed (inserted or reported as existing)."""
+    key = donation_key(date, name, amount, pan)
+    receipt_no = receipt_no.strip()
+    with _lock:
+        _journal.record("remember", key, receipt_no)
+        _remember(_receipt_by_key, _key_by_receipt, key, receipt_no)
+
+def _remember(receipt_by_key, key_by_receipt, key: DonationKey, receipt_no: str):
+    previous = key_by_receipt.get(receipt_no)
+    if previous is not None and previous != key:
+        receipt_by_key.pop(previous, None)
+    receipt_by_key[key] = receipt_no
+    key_by_receipt[receipt_no] = key
+
+def forget_receipt(receipt_no: str):
+    """Drops a receipt from the index, e.g. after its record was edited."""
+    receipt_no = receipt_no.strip()
+    with _lock:
+        _journal.record("forget", None, receipt_no)
+        _forget(_receipt_by_key, _key_by_receipt, receipt_no)
+
+def _forget(receipt_by_key, key_by_receipt, receipt_no: str):
+    key = key_by_receipt.pop(receipt_no, None)
+    if key is not None and receipt_by_key.get(key) == receipt_no:
+        del receipt_by_key[key]
+
+def needs_seeding(since_date: str) -> bool:
+    """True if the index has never been seeded back to `since_date` or is older than the refresh interval."""
+    with _lock:
+        return (_seeded_since is None or since_date < _seeded_since
+                or time.time() - _seeded_at > DUPLICATE_INDEX_REFRESH_SECONDS)
+
+def seed_duplicate_index(rows: Iterable[Dict[str, Any]], since_date: str) -> int:
+    """
+    Replaces the index with `rows` (dicts with receipt_no, name, pan, amount, date).
+    Rows are consumed before the swap, so a failed fetch leaves the old index
+    intact, and donations remembered or forgotten meanwhile are replayed onto
+    the new one. Returns the number of donations indexed.
+    """
+    def build():
+        receipt_by_key, key_by_receipt = {}, {}
+        for row in rows:
+            if not row.get("receipt_no") or row.get("amount") is None:
+                continue
+            key = donation_key(row["date"], row["name"], row["amount"], row.get("pan"))
+            receipt_by_key[key] = row["receipt_no"]
+            key_by_receipt[row["receipt_no"]] = key
+        return receipt_by_key, key_by_receipt
+
+    def replay(index, entry):
+        action, key, receipt_no = entry
+        if action == "remember":
+            _remember(*index, key, receipt_no)
+        else:
+            _forget(*index, receipt_no)
+
+    def swap(index):
+        global _receipt_by_key, _key_by_receipt, _seeded_at, _seeded_since
+        _receipt_by_key, _key_by_receipt = index
+        _seeded_at = time.time()
+        _seeded_since = since_date
+
+    receipt_by_key, _ = _journal.rebuild(build, replay, swap)
+    return len(receipt_by_key)
+
+def reset_duplicate_index():
+    """Empties the index and marks it unseeded, e.g. between benchmark runs against a wiped database."""
+    global _receipt_by_key, _key_by_receipt, _seeded_at, _seeded_since
+    with _lock:
+        _receipt_by_key, _key_by_receipt = {}, {}
+        _seeded_at, _seeded_since = 0.0, None
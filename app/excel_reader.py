@@ -0,0 +1,180 @@
+# app/excel_reader.py
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from config import EXCEL_READER, EXCEL_READ_CHUNK_SIZE, EXCEL_READ_PREFETCH_CHUNKS
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Streams the first sheet of an uploaded workbook as DataFrames of a few
+# thousand rows, so an upload can be validated and inserted chunk by chunk
+# while the rest of the file is still being parsed, with memory bounded by the
+# chunk size instead of the sheet size. Values are strings ('' for empty
+# cells), as pd.read_excel(..., dtype=str).fillna('') would give.
+#
+# A reader takes the uploaded file and returns (estimated_row_count, rows),
+# where rows yields tuples of cell values, header row first.
+RowReader = Callable[[Any], Tuple[Optional[int], Iterable[tuple]]]
+
+@dataclass
+class ExcelChunk:
+    frame: pd.DataFrame       # indexed by data row position, so Excel row = index + 2
+    rows_read: int            # data rows read so far, including this chunk
+    total_rows: Optional[int] # estimate from the sheet dimensions, if the format records one
+
+def _cell_text(value: Any) -> str:
+    """Formats a cell the way read_excel(dtype=str) does."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return str(datetime.combine(value, time()))
+    return str(value)
+
+def _calamine_rows(file) -> Tuple[Optional[int], Iterable[tuple]]:
+    sheet = CalamineWorkbook.from_filelike(file).get_sheet_by_index(0)
+    return max(sheet.height - 1, 0), sheet.iter_rows()
+
+def _openpyxl_rows(file) -> Tuple[Optional[int], Iterable[tuple]]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    sheet = workbook.worksheets[0]
+    total = sheet.max_row - 1 if sheet.max_row else None
+
+    def rows():
+        try:
+            yield from sheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    return total, rows()
+
+def _pandas_rows(file) -> Tuple[Optional[int], Iterable[tuple]]:
+    # Loads the whole sheet; used for .xls, which the streaming readers cannot open.
+    df = pd.read_excel(file, header=None, dtype=object)
+    return max(len(df) - 1, 0), df.itertuples(index=False, name=None)
+
+EXCEL_READERS: Dict[str, RowReader] = {
+    "calamine": _calamine_rows,
+    "openpyxl": _openpyxl_rows,
+    "pandas": _pandas_rows,
+}
+
+def register_excel_reader(name: str, reader: RowReader):
+    """Adds a reader that EXCEL_READER (or the `reader` argument) can select by name."""
+    EXCEL_READERS[name] = reader
+
+def _choose_reader(file, reader: str) -> RowReader:
+    if reader != "auto":
+        return EXCEL_READERS[reader]
+    if str(getattr(file, "name", "")).lower().endswith(".xls"):
+        return EXCEL_READERS["pandas"]
+    return EXCEL_READERS["calamine" if CalamineWorkbook is not None else "openpyxl"]
+
+def _header(values: tuple) -> List[str]:
+    """Column names as read_excel makes them: blanks become 'Unnamed: i', repeats get '.1', '.2'."""
+    names, seen = [], {}
+    for position, value in enumerate(values):
+        name = _cell_text(value) or f"Unnamed: {position}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _read_chunks(file, chunk_size: int, reader: str) -> Iterator[ExcelChunk]:
+    total, rows = _choose_reader(file, reader)(file)
+    rows = iter(rows)
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    columns = _header(header_row)
+    width = len(columns)
+
+    batch, blank_run, start, rows_read = [], [], 0, 0
+    for values in rows:
+        texts = [_cell_text(value) for value in values[:width]]
+        texts += [""] * (width - len(texts))
+        # Blank rows are held back until a filled row follows, so trailing
+        # formatting-only rows are dropped but row numbers stay true.
+        if not any(texts):
+            blank_run.append(texts)
+            continue
+        batch.extend(blank_run)
+        blank_run = []
+        batch.append(texts)
+        if len(batch) >= chunk_size:
+            rows_read += len(batch)
+            yield ExcelChunk(pd.DataFrame(batch, columns=columns, index=range(start, rows_read)), rows_read, total)
+            start, batch = rows_read, []
+    if batch:
+        rows_read += len(batch)
+        yield ExcelChunk(pd.DataFrame(batch, columns=columns, index=range(start, rows_read)), rows_read, total)
+
+_DONE = object()
+
+def _prefetched(chunks: Iterator[ExcelChunk], depth: int) -> Iterator[ExcelChunk]:
+    """Parses up to `depth` chunks ahead in a background thread."""
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    threading.Thread(target=produce, name="excel-reader", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Lets the producer exit if the caller stops early.
+        stop.set()
+
+def iter_excel_chunks(file, chunk_size: int = EXCEL_READ_CHUNK_SIZE, reader: str = EXCEL_READER,
+                      prefetch: int = EXCEL_READ_PREFETCH_CHUNKS) -> Iterator[ExcelChunk]:
+    """
+    Yields the first sheet of `file` as ExcelChunk objects of `chunk_size` rows.
+
+    Args:
+        file: A path or binary file-like object (e.g. a Streamlit UploadedFile).
+        chunk_size (int): Data rows per chunk.
+        reader (str): A name from EXCEL_READERS, or "auto" for calamine when
+            installed, otherwise openpyxl in read-only mode (pandas for .xls).
+        prefetch (int): Chunks parsed ahead in a background thread; 0 parses
+            in the caller's thread.
+
+    Returns:
+        Iterator[ExcelChunk]: Chunks in sheet order. Read errors are raised
+        from the iteration that hits them.
+    """
+    chunks = _read_chunks(file, chunk_size, reader)
+    return _prefetched(chunks, prefetch) if prefetch > 0 else chunks
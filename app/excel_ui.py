@@ -1,187 +1,262 @@
 # app/excel_ui.py
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 import os
+import io
 from dateutil.parser import parse
+from reportlab.lib.pagesizes import A4
 
-from app.validators import validate_amount, validate_pan, validate_name, validate_date
-from app.supabase_client import process_donor_and_get_receipt_no, set_receipt_generated_flag
-from app.pdf_generator import create_receipt_pdf, ReceiptData
-from app.config import BASE_PDF_OUTPUT_DIR
-from app.zip_utils import create_zip_from_directory
+from validators import validate_donor_columns
+from excel_reader import iter_excel_chunks
+from supabase_client import process_donors_bulk, refresh_duplicate_index
+from duplicate_index import donation_key, find_duplicate
+from db_outbox import enqueue_report_flags
+from config import DONOR_RPC_CHUNK_SIZE
+from pdf_generator import create_receipts_pdf, ReceiptData
+from render_pool import render_receipts
+from zip_utils import ZipArchiveWriter
+from receipt_storage import new_session_dir, ensure_session_dir, new_batch_zip_path, record_stored_file
+
+def _text(df, column):
+    """A sheet column as stripped strings, or empty strings if the sheet lacks it."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].astype(str).str.strip()
+
+def _normalize_columns(df):
+    """Maps the client's column headers to the application's and adds defaulted columns."""
+    # Normalize column headers to uppercase for consistent mapping
+    df.columns = [str(c).strip().upper() for c in df.columns]
+
+    # Define the mapping from client headers to application headers
+    column_mapping = {
+        'S.NO': 'Serial No',
+        'D.O.D': 'Date',
+        'DONOR NAME': 'Name',
+        'AMOUNT': 'Amount',
+        'RECEIPT NUMBER': 'RECEIPT NUMBER'
+    }
+
+    # Rename the columns based on the mapping
+    df.rename(columns=column_mapping, inplace=True)
+
+    # After renaming, check for and add default columns if they are missing
+    if 'Address' not in df.columns:
+        df['Address'] = 'Tamil Nadu'  # Default value
+
+    if 'Pan' not in df.columns:
+        df['Pan'] = 'xxxxx1234x'  # Default value
+    return df
 
 def excel_upload_page():
+    # Starts loading recent donations for duplicate checks while a file is picked.
+    refresh_duplicate_index()
+
     # === PDF Session Directory Initialization ===
     if not st.session_state.get('current_pdf_session_dir'):
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        session_dir_name = f"ht_donation_receipt_{timestamp}"
-        full_session_dir_path = os.path.join(BASE_PDF_OUTPUT_DIR, session_dir_name)
-        os.makedirs(full_session_dir_path, exist_ok=True)
-        st.session_state['current_pdf_session_dir'] = full_session_dir_path
-        st.info(f"PDFs for this session will be saved in: {full_session_dir_path}", icon="🗂️")
+        st.session_state['current_pdf_session_dir'] = new_session_dir()
+        st.info(f"PDFs for this session will be saved in: {st.session_state['current_pdf_session_dir']}", icon="🗂️")
 
     uploaded_file = st.file_uploader("Choose an Excel file", type=["xlsx", "xls"])
+    # Print sheets draw every receipt again in this process, so they are opt-in.
+    build_print_sheets = st.checkbox("Also build A4 print sheets")
     process_btn = st.button("Process Excel File")
 
     if process_btn:
         if uploaded_file:
+            # The sheet is read in chunks in the background; each chunk is
+            # validated and inserted while the next ones are being parsed.
+            chunks = iter_excel_chunks(uploaded_file)
             try:
-                df = pd.read_excel(uploaded_file, dtype=str).fillna('')
-                st.info(f"📄 Reading {len(df)} rows...")
+                chunk = next(chunks, None)
             except Exception as e:
                 st.error(f"❌ Failed to read Excel file: {e}")
                 return
-
-            # Normalize column headers to uppercase for consistent mapping
-            df.columns = [str(c).strip().upper() for c in df.columns]
-
-            # Define the mapping from client headers to application headers
-            column_mapping = {
-                'S.NO': 'Serial No',
-                'D.O.D': 'Date',
-                'DONOR NAME': 'Name',
-                'AMOUNT': 'Amount',
-                'RECEIPT NUMBER': 'RECEIPT NUMBER'
-            }
-
-            # Rename the columns based on the mapping
-            df.rename(columns=column_mapping, inplace=True)
-
-            # After renaming, check for and add default columns if they are missing
-            if 'Address' not in df.columns:
-                df['Address'] = 'Tamil Nadu'  # Default value
-
-            if 'Pan' not in df.columns:
-                df['Pan'] = 'xxxxx1234x'  # Default value
+            if chunk is None:
+                st.warning("⚠️ The Excel file has no rows to process.")
+                return
 
             # Define the columns that MUST have data in the Excel file
             required_columns = ['Name', 'Amount', 'Date', 'RECEIPT NUMBER']
-            if not all(col in df.columns for col in required_columns):
+            if not all(col in _normalize_columns(chunk.frame.head(0)).columns for col in required_columns):
                 # This check ensures the essential columns were found and mapped correctly
                 st.error(f"Excel file is missing one or more required columns: {required_columns}")
                 return
 
             success_count, skipped_count, error_count = 0, 0, 0
-            total_rows = len(df)
             log_messages = []
+            generated_receipts = []
+            pending_receipts = []
 
-            progress_bar = st.progress(0)
-            for index, row in df.iterrows():
-                row_num = index + 2
-                progress_bar.progress((index + 1) / total_rows)
-                errors = []
+            user_email = st.session_state.get('user_email', 'UNKNOWN')
+            # Known duplicates and rows repeated within this file never reach the server.
+            first_row_by_key = {}
+            in_file_duplicates = []
+            receipt_by_row = {}
 
+            progress_bar = st.progress(0.0, text="📄 Reading Excel file...")
+            while chunk is not None:
+                df = _normalize_columns(chunk.frame)
+                valid_rows = []
+
+                # --- Pass 1: validate the chunk locally, column by column ---
+                receipt_nos = _text(df, 'RECEIPT NUMBER').str.upper()
                 # Skip if receipt number is present (already has a physical receipt or marked as DUM)
-                receipt_no = str(row.get('RECEIPT NUMBER', '')).strip().upper()
-                if receipt_no and (receipt_no.startswith('R7-') or receipt_no == 'DUM'):
-                    log_messages.append(f"Skipped Row {row_num}: Receipt number present or marked as DUM ({receipt_no}).")
-                    skipped_count += 1
-                    continue
-
-                # --- Validation using new functions ---
-                date_str = str(row.get('Date', '')).strip()
-                date_obj, date_error = validate_date(date_str)
-                if date_error:
-                    errors.append(f"Date ('{date_str}'): {date_error}")
-
-                name = str(row.get('Name', '')).strip()
-                is_valid_name, name_error = validate_name(name)
-                if not is_valid_name:
-                    errors.append(name_error)
-
-                amount_str = str(row.get('Amount', '')).strip()
-                amount_float, amount_error = validate_amount(amount_str)
-                if amount_error:
-                    errors.append(f"Amount ('{amount_str}'): {amount_error}")
-
-                pan = str(row.get('Pan', '')).strip().upper()
-                is_valid_pan, pan_error = validate_pan(pan)
-                if not is_valid_pan:
-                    errors.append(f"PAN ('{pan}'): {pan_error}")
-
-                address = str(row.get('Address', '')).strip()
-
-                # If any validation errors occurred, log them and skip the row
-                if errors:
-                    log_messages.append(f"Skipped Row {row_num}: " + ", ".join(errors))
-                    skipped_count += 1
-                    continue
-                
-                # --- Proceed with valid data ---
-                db_date = date_obj.strftime('%Y-%m-%d')
-                pdf_date = date_obj.strftime('%d-%m-%Y')
-                address = str(row.get('Address', '')).strip()
-                user_email = st.session_state.get('user_email', 'UNKNOWN')
-                
-                serial_no = None
-                if 'Serial No' in row and str(row['Serial No']).strip().isdigit():
-                    serial_no = int(row['Serial No'])
-
-                success, result_string = process_donor_and_get_receipt_no(
-                    date=db_date,
-                    name=name,
-                    amount=amount_float,
-                    address=address,
-                    pan=pan,
-                    serial_no=serial_no,
-                    user_email=user_email,
-                    entry_mode="excel"
-                )
-                if not success:
-                    log_messages.append(f"Error Row {row_num} ({pan}): Supabase error - {result_string}")
-                    error_count += 1
-                    continue
-
-                if result_string.startswith('exists:'):
-                    existing_receipt_no = result_string.split(':', 1)[1]
-                    log_messages.append(f"Row {row_num}: Record already exists with receipt number {existing_receipt_no}.")
-                    skipped_count += 1
-                elif 'ONL' in result_string:
-                    receipt_no = result_string
-                    receipt_data = ReceiptData(
-                        receipt_no=receipt_no,
-                        date=pdf_date,
-                        name=name,
-                        amount=amount_float,
-                        address=address,
-                        pan=pan
-                    )
-                    if not st.session_state.get('current_pdf_session_dir'):
-                        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                        session_dir_name = f"ht_donation_receipt_{timestamp}"
-                        full_session_dir_path = os.path.join(BASE_PDF_OUTPUT_DIR, session_dir_name)
-                        os.makedirs(full_session_dir_path, exist_ok=True)
-                        st.session_state['current_pdf_session_dir'] = full_session_dir_path
-                        st.info(f"PDFs for this session will be saved in: {full_session_dir_path}", icon="🗂️")
-                    pdf_path = create_receipt_pdf(receipt_data, st.session_state['current_pdf_session_dir'])
-                    if pdf_path:
-                        if set_receipt_generated_flag(receipt_no):
-                            log_messages.append(f"Success Row {row_num}: Generated {receipt_no}.pdf")
-                            success_count += 1
+                skip_mask = receipt_nos.str.startswith('R7-') | (receipt_nos == 'DUM')
+                checked = validate_donor_columns(df)
+                db_dates = checked['date'].dt.strftime('%Y-%m-%d')
+                pdf_dates = checked['date'].dt.strftime('%d-%m-%Y')
+                serial_text = _text(df, 'Serial No')
+                serial_nos = serial_text.where(serial_text.str.isdigit())
+
+                for row_num, receipt_no, skip, has_error, message, db_date, pdf_date, name, amount_float, pan, address, serial in zip(
+                        (df.index + 2).tolist(), receipt_nos.tolist(), skip_mask.tolist(), checked['error'].tolist(),
+                        checked['message'].tolist(), db_dates.tolist(), pdf_dates.tolist(), checked['name'].tolist(),
+                        checked['amount'].tolist(), checked['pan'].tolist(), checked['address'].tolist(), serial_nos.tolist()):
+                    if skip:
+                        log_messages.append(f"Skipped Row {row_num}: Receipt number present or marked as DUM ({receipt_no}).")
+                        skipped_count += 1
+                        continue
+
+                    # If any validation errors occurred, log them and skip the row
+                    if has_error:
+                        log_messages.append(f"Skipped Row {row_num}: {message}")
+                        skipped_count += 1
+                        continue
+
+                    existing_receipt_no = find_duplicate(db_date, name, amount_float, pan)
+                    if existing_receipt_no:
+                        log_messages.append(f"Row {row_num}: Record already exists with receipt number {existing_receipt_no}.")
+                        skipped_count += 1
+                        continue
+                    key = donation_key(db_date, name, amount_float, pan)
+                    if key in first_row_by_key:
+                        in_file_duplicates.append((row_num, first_row_by_key[key]))
+                        continue
+                    first_row_by_key[key] = row_num
+
+                    valid_rows.append((row_num, pdf_date, {
+                        "date": db_date,
+                        "name": name,
+                        "amount": amount_float,
+                        "address": address,
+                        "pan": pan,
+                        "serial_no": int(serial) if isinstance(serial, str) else None
+                    }))
+
+                # --- Pass 2: insert the chunk's valid rows with one bulk RPC per RPC chunk ---
+                for rpc_start in range(0, len(valid_rows), DONOR_RPC_CHUNK_SIZE):
+                    rpc_chunk = valid_rows[rpc_start:rpc_start + DONOR_RPC_CHUNK_SIZE]
+                    results = process_donors_bulk([donor for _, _, donor in rpc_chunk], user_email=user_email, entry_mode="excel")
+
+                    for (row_num, pdf_date, donor), (success, result_string) in zip(rpc_chunk, results):
+                        pan = donor["pan"]
+                        if not success:
+                            log_messages.append(f"Error Row {row_num} ({pan}): Supabase error - {result_string}")
+                            error_count += 1
+                            continue
+
+                        if result_string.startswith('exists:'):
+                            existing_receipt_no = result_string.split(':', 1)[1]
+                            receipt_by_row[row_num] = existing_receipt_no
+                            log_messages.append(f"Row {row_num}: Record already exists with receipt number {existing_receipt_no}.")
+                            skipped_count += 1
+                        elif 'ONL' in result_string:
+                            receipt_by_row[row_num] = result_string
+                            receipt_data = ReceiptData(
+                                receipt_no=result_string,
+                                date=pdf_date,
+                                name=donor["name"],
+                                amount=donor["amount"],
+                                address=donor["address"],
+                                pan=pan
+                            )
+                            if not st.session_state.get('current_pdf_session_dir'):
+                                st.session_state['current_pdf_session_dir'] = new_session_dir()
+                                st.info(f"PDFs for this session will be saved in: {st.session_state['current_pdf_session_dir']}", icon="🗂️")
+                            pending_receipts.append((row_num, receipt_data))
                         else:
-                            log_messages.append(f"Error Row {row_num}: Generated PDF for {receipt_no} but FAILED to update DB flag.")
+                            log_messages.append(f"Error Row {row_num} ({pan}): Unknown response from server - '{result_string}'")
                             error_count += 1
-                    else:
-                        log_messages.append(f"Error Row {row_num}: Failed to generate PDF, it has already generated {receipt_no}.")
-                        error_count += 1
+
+                rows_read, total_rows = chunk.rows_read, chunk.total_rows
+                if total_rows:
+                    progress_bar.progress(min(rows_read / total_rows, 1.0), text=f"📄 Processed {rows_read:,} of ~{total_rows:,} rows")
                 else:
-                    log_messages.append(f"Error Row {row_num} ({pan}): Unknown response from server - '{result_string}'")
+                    progress_bar.progress(0.0, text=f"📄 Processed {rows_read:,} rows")
+
+                try:
+                    chunk = next(chunks, None)
+                except Exception as e:
+                    # Rows already inserted still get their receipts below.
+                    st.error(f"❌ Failed to read the Excel file after row {rows_read + 1}: {e}")
+                    log_messages.append(f"Stopped reading after row {rows_read + 1}: {e}")
                     error_count += 1
+                    chunk = None
+            progress_bar.progress(1.0, text=f"📄 Processed {rows_read:,} rows")
+
+            for row_num, first_row_num in in_file_duplicates:
+                first_receipt_no = receipt_by_row.get(first_row_num)
+                if first_receipt_no:
+                    log_messages.append(f"Row {row_num}: Duplicate of row {first_row_num} in this file (receipt number {first_receipt_no}).")
+                else:
+                    log_messages.append(f"Row {row_num}: Duplicate of row {first_row_num} in this file, which was not inserted.")
+                skipped_count += 1
+
+            # --- Render all new receipts in parallel, then flag them in the DB ---
+            # Each receipt is appended to this batch's ZIP as soon as it is rendered.
+            batch_zip_path = None
+            if pending_receipts:
+                # The folder may have been evicted while the page sat idle.
+                session_dir = ensure_session_dir(st.session_state.get('current_pdf_session_dir'))
+                st.session_state['current_pdf_session_dir'] = session_dir
+                batch_zip_path = new_batch_zip_path(session_dir)
+                with st.spinner(f"⏳ Generating {len(pending_receipts)} PDF(s)..."), ZipArchiveWriter(batch_zip_path) as archive:
+                    render_results = render_receipts(
+                        [receipt_data for _, receipt_data in pending_receipts],
+                        session_dir,
+                        archive=archive
+                    )
+                record_stored_file(session_dir, batch_zip_path)
+                # The 'report' flags are sent by the outbox in the background and retried until they succeed.
+                enqueue_report_flags([
+                    receipt_data.receipt_no
+                    for (_, receipt_data), (rendered_ok, _) in zip(pending_receipts, render_results) if rendered_ok
+                ])
+                for (row_num, receipt_data), (rendered_ok, render_result) in zip(pending_receipts, render_results):
+                    receipt_no = receipt_data.receipt_no
+                    if rendered_ok:
+                        log_messages.append(f"Success Row {row_num}: Generated {receipt_no}.pdf")
+                        success_count += 1
+                        generated_receipts.append(receipt_data)
+                    else:
+                        log_messages.append(f"Error Row {row_num}: Failed to generate PDF for {receipt_no} - {render_result}")
+                        error_count += 1
 
             st.success(f"Processing Complete! Success: {success_count}, Skipped: {skipped_count}, Errors: {error_count}")
             st.text_area("Processing Log", value="\n".join(log_messages), height=300)
 
             # --- Download as ZIP ---
             if success_count > 0:
-                zip_bytes = create_zip_from_directory(st.session_state['current_pdf_session_dir'])
-                if zip_bytes:
+                with open(batch_zip_path, "rb") as zip_file:
                     st.download_button(
                         label="Download All as ZIP",
-                        data=zip_bytes,
-                        file_name=f"{os.path.basename(st.session_state['current_pdf_session_dir'])}.zip",
+                        data=zip_file,
+                        file_name=os.path.basename(batch_zip_path),
                         mime="application/zip"
                     )
+
+            if success_count > 0 and build_print_sheets:
+                sheets_buffer = io.BytesIO()
+                with st.spinner(f"⏳ Building print sheets for {len(generated_receipts)} receipt(s)..."):
+                    rendered, _ = create_receipts_pdf(generated_receipts, sheets_buffer, sheet_size=A4)
+                if rendered:
+                    st.download_button(
+                        label="Download Print Sheets (A4)",
+                        data=sheets_buffer.getvalue(),
+                        file_name=f"{os.path.basename(st.session_state['current_pdf_session_dir'])}_print.pdf",
+                        mime="application/pdf"
+                    )
         else:
             st.warning("⚠️ Please choose a file before processing.")
 
@@ -4,9 +4,10 @@ import uuid
 from datetime import datetime
 import os
 
-from app.validators import validate_amount, validate_name, validate_pan, validate_date
-from app.supabase_client import process_donor_and_get_receipt_no, set_receipt_generated_flag
-from app.pdf_generator import create_receipt_pdf, ReceiptData
+from validators import validate_amount, validate_name, validate_pan, validate_date
+from supabase_client import process_donor_and_get_receipt_no, set_receipt_generated_flag
+from db_outbox import enqueue_report_flags
+from pdf_generator import get_receipt_bytes, receipt_filename, ReceiptData
 
 from config import (
     APP_TITLE_PREFIX, DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT,
@@ -30,12 +31,12 @@ def ui_form_page():
         st.session_state[address_key] = ""
         st.session_state[pan_key] = ""
         st.session_state[amount_key] = None
-        st.session_state["pdf_path"] = None
+        st.session_state["pdf_bytes"] = None
         st.session_state["receipt_no"] = None
 
-    # Initialize session state for PDF path and receipt number
-    if "pdf_path" not in st.session_state:
-        st.session_state["pdf_path"] = None
+    # Initialize session state for PDF bytes and receipt number
+    if "pdf_bytes" not in st.session_state:
+        st.session_state["pdf_bytes"] = None
     if "receipt_no" not in st.session_state:
         st.session_state["receipt_no"] = None
     if "show_form" not in st.session_state:
@@ -55,16 +56,16 @@ def ui_form_page():
 
 
     # Display download button if a PDF has been generated
-    if st.session_state.get("pdf_path") and st.session_state.get("receipt_no"):
+    if st.session_state.get("pdf_bytes") and st.session_state.get("receipt_no"):
         st.success(f"✅ Success! PDF for {st.session_state['receipt_no']} generated.")
-        with open(st.session_state["pdf_path"], "rb") as f:
-            pdf_bytes = f.read()
         st.download_button(
             label="Download Receipt",
-            data=pdf_bytes,
-            file_name=os.path.basename(st.session_state["pdf_path"]),
+            data=st.session_state["pdf_bytes"],
+            file_name=receipt_filename(st.session_state["receipt_no"]),
             mime="application/pdf"
         )
+        if st.session_state.get("flag_queued"):
+            st.warning(f"⚠️ DB update failed for {st.session_state['receipt_no']}. It has been queued and will be retried automatically.")
 
     if st.session_state["show_form"]:
         # Create a form for the input fields
@@ -105,7 +106,7 @@ def ui_form_page():
                 if errors:
                     for err in errors:
                         st.error(err)
-                    st.session_state["pdf_path"] = None
+                    st.session_state["pdf_bytes"] = None
                     st.session_state["receipt_no"] = None
                 else:
                     pdf_formatted_date = date_obj.strftime("%d-%m-%Y")
@@ -124,11 +125,11 @@ def ui_form_page():
                     )
                     if not success:
                         st.error(f"❌ Error: {result_string}")
-                        st.session_state["pdf_path"] = None
+                        st.session_state["pdf_bytes"] = None
                         st.session_state["receipt_no"] = None
                     elif result_string == 'exists':
                         st.warning("⚠️ Duplicate: This record already exists.")
-                        st.session_state["pdf_path"] = None
+                        st.session_state["pdf_bytes"] = None
                         st.session_state["receipt_no"] = None
                     elif 'ONL' in result_string:
                         receipt_no = result_string
@@ -141,31 +142,23 @@ def ui_form_page():
                             address=st.session_state[address_key],
                             pan=st.session_state[pan_key]
                         )
-                        if not st.session_state.get('current_pdf_session_dir'):
-                            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                            session_dir_name = f"ht_donation_receipt_{timestamp}"
-                            from config import BASE_PDF_OUTPUT_DIR
-                            full_session_dir_path = os.path.join(BASE_PDF_OUTPUT_DIR, session_dir_name)
-                            os.makedirs(full_session_dir_path, exist_ok=True)
-                            st.session_state['current_pdf_session_dir'] = full_session_dir_path
-                            st.info(f"PDFs for this session will be saved in: {full_session_dir_path}", icon="🗂️")
-                        pdf_path = create_receipt_pdf(receipt_data, st.session_state['current_pdf_session_dir'])
-                        if pdf_path:
-                            if set_receipt_generated_flag(receipt_no):
-                                st.session_state["pdf_path"] = pdf_path
-                                st.session_state["receipt_no"] = receipt_no
-                                st.rerun()
-                            else:
-                                st.warning(f"⚠️ PDF created, but DB update failed for {receipt_no}!")
-                                st.session_state["pdf_path"] = None
-                                st.session_state["receipt_no"] = None
+                        pdf_bytes = get_receipt_bytes(receipt_data)
+                        if pdf_bytes:
+                            # On failure the flag is queued for background retry; the PDF is still offered.
+                            flag_updated = set_receipt_generated_flag(receipt_no)
+                            if not flag_updated:
+                                enqueue_report_flags([receipt_no])
+                            st.session_state["flag_queued"] = not flag_updated
+                            st.session_state["pdf_bytes"] = pdf_bytes
+                            st.session_state["receipt_no"] = receipt_no
+                            st.rerun()
                         else:
                             st.error(f"❌ PDF generation failed for {receipt_no}.")
-                            st.session_state["pdf_path"] = None
+                            st.session_state["pdf_bytes"] = None
                             st.session_state["receipt_no"] = None
                     else:
                         st.error(f"❌ Unknown Error: Server returned '{result_string}'")
-                        st.session_state["pdf_path"] = None
+                        st.session_state["pdf_bytes"] = None
                         st.session_state["receipt_no"] = None
 
     col1, col2 = st.columns(2)
@@ -1,11 +1,12 @@
 # app/pdf_generator.py
+import hashlib
+import io
+import json
 import os
 import re
-import shutil
-import tempfile
 import traceback
-from dataclasses import dataclass
-from num2words import num2words
+from dataclasses import dataclass, asdict
+from typing import Iterable, List, Optional, Tuple, Union, BinaryIO
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
@@ -16,7 +17,13 @@ from reportlab.lib.enums import TA_CENTER
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+from receipt_assets import get_image_reader
+from amount_words import amount_to_words
+from render_cache import get_cached_receipt, store_receipt
+from receipt_storage import record_stored_file
+from perf_metrics import instrumented, timed
 from config import (
+    RECEIPT_PDF_BYTE_BUDGET,
     LOGO_PATH, SIGNATURE_PATH, QR_CODE_PATH, FONT_PATH, FONT_BOLD_PATH,
     UI_PRIMARY_COLOR, UI_PRIMARY_COLOR_DARK, UI_NEUTRAL_WHITE, UI_NEUTRAL_BLACK,
     UI_GREY_LIGHTEST, UI_GREY_LIGHT, UI_GREY_MEDIUM, UI_GREY_DARK, UI_GREY_DARKER,
@@ -34,6 +41,7 @@ class ReceiptData:
     org_pan: str = "AAATH7141M"
     purpose: str = "Education"
 
+# Fonts are registered once, when this module is imported.
 try:
     pdfmetrics.registerFont(TTFont('Poppins', FONT_PATH))
     pdfmetrics.registerFont(TTFont('Poppins-Bold', FONT_BOLD_PATH))
@@ -54,10 +62,267 @@ COLOR_WHITE = UI_NEUTRAL_WHITE
 
 PAGE_WIDTH, PAGE_HEIGHT = landscape((108 * mm, 140 * mm))
 
+# --- Receipt Layout ---
+# Every coordinate on the receipt is fixed, so the geometry is computed once
+# at import time and shared by the static template and the per-donor fields.
+X_MARGIN = 8 * mm
+CONTENT_WIDTH = PAGE_WIDTH - (2 * X_MARGIN)
+HEADER_H = PAGE_HEIGHT * 0.20
+FOOTER_H = PAGE_HEIGHT * 0.20
+DETAILS_TOP_Y = PAGE_HEIGHT - HEADER_H
+
+SEC1_WIDTH = CONTENT_WIDTH * 0.20
+SEC2_WIDTH = CONTENT_WIDTH * 0.60
+SEC3_WIDTH = CONTENT_WIDTH * 0.20
+SEC1_CENTER_X = X_MARGIN + (SEC1_WIDTH / 2)
+SEC2_CENTER_X = X_MARGIN + SEC1_WIDTH + (SEC2_WIDTH / 2)
+SEC3_CENTER_X = X_MARGIN + SEC1_WIDTH + SEC2_WIDTH + (SEC3_WIDTH / 2)
+HEADER_CENTER_Y = DETAILS_TOP_Y + HEADER_H - (20 * mm / 2) - (2 * mm)
+
+LOGO_SIZE = 16 * mm
+TITLE_Y = DETAILS_TOP_Y - 7 * mm
+GREETING_Y = TITLE_Y - 8 * mm
+APPRECIATION_Y = GREETING_Y - 6 * mm
+DETAILS_HEADING_Y = APPRECIATION_Y - 10 * mm
+LINE_HEIGHT = 6 * mm
+COL1_X = X_MARGIN
+COL2_X = X_MARGIN + (CONTENT_WIDTH / 2)
+VALUE_OFFSET = 25 * mm
+
+def _row_y(row: int) -> float:
+    """Baseline of the n-th (1-based) line below the details heading."""
+    return DETAILS_HEADING_Y - row * LINE_HEIGHT
+
+SIG_WIDTH, SIG_HEIGHT = 30 * mm, FOOTER_H - 4 * mm
+QR_SIZE = FOOTER_H
+SIG_X = X_MARGIN
+SIG_Y = (FOOTER_H - SIG_HEIGHT) / 2 + 2 * mm
+QR_X = PAGE_WIDTH - X_MARGIN - QR_SIZE
+QR_Y = (FOOTER_H - QR_SIZE) / 2 + 6 * mm
+FOOTER_TEXT_X = SIG_X + SIG_WIDTH + 4 * mm
+FOOTER_TEXT_WIDTH = QR_X - FOOTER_TEXT_X - 4 * mm
+
+# Bump whenever the static layer or field placement changes.
+TEMPLATE_VERSION = 1
+
+GREETING_STYLE = ParagraphStyle(name='ThankYouMessage', fontName=FONT_BOLD, fontSize=12, textColor=COLOR_ACCENT_CORAL)
+FOOTER_STYLE = ParagraphStyle(
+    'footer',
+    fontName=FONT_REGULAR,
+    fontSize=7,
+    textColor=COLOR_TEXT_GRAY,
+    alignment=TA_CENTER,
+    leading=9
+)
+
+def _static_form_name(org_pan: str) -> str:
+    """PDF form XObject name for the static layer of a given org PAN."""
+    return f"HTStatic{TEMPLATE_VERSION}_{re.sub(r'[^A-Za-z0-9]', '', org_pan.upper())}"
+
+def _draw_static_layer(c: canvas.Canvas, org_pan: str):
+    """Draws everything on a receipt that does not depend on the donor."""
+    # --- Backgrounds ---
+    c.setFillColor(COLOR_WHITE)
+    c.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, fill=1, stroke=0)
+    c.setFillColor(COLOR_BG_DARKER_GRAY)
+    c.rect(0, DETAILS_TOP_Y, PAGE_WIDTH, HEADER_H, fill=1, stroke=0)
+    c.rect(0, 0, PAGE_WIDTH, FOOTER_H, fill=1, stroke=0)
+
+    # === HEADER ===
+    c.drawImage(get_image_reader(LOGO_PATH, LOGO_SIZE, LOGO_SIZE), SEC1_CENTER_X - (LOGO_SIZE / 2), HEADER_CENTER_Y - (LOGO_SIZE / 2),
+                height=LOGO_SIZE, width=LOGO_SIZE, preserveAspectRatio=True, mask='auto')
+
+    c.setFont(FONT_BOLD, 28)
+    c.setFillColor(COLOR_TEXT_DARK)
+    c.drawCentredString(SEC2_CENTER_X, HEADER_CENTER_Y + 0.5*mm, "HOPE TRUST")
+    c.setFont(FONT_REGULAR, 5)
+    c.setFillColor(COLOR_TEXT_GRAY)
+    c.drawCentredString(SEC2_CENTER_X, HEADER_CENTER_Y - 4.5*mm, "RECOGNIZED BY GOVT. OF TAMIL NADU")
+    c.setFont(FONT_BOLD, 6)
+    c.setFillColor(COLOR_TEXT_DARK)
+    c.drawCentredString(SEC2_CENTER_X, HEADER_CENTER_Y - 7.5*mm, "REG. NO: 174/2017 | PH. NO: 7397271881")
+
+    c.setFont(FONT_REGULAR, 8)
+    c.setFillColor(COLOR_TEXT_GRAY)
+    c.drawCentredString(SEC3_CENTER_X, HEADER_CENTER_Y + 2*mm, "RECEIPT NO:")
+
+    c.setStrokeColor(COLOR_BORDER_LIGHT)
+    c.setLineWidth(0.5)
+    c.line(X_MARGIN, DETAILS_TOP_Y, PAGE_WIDTH - X_MARGIN, DETAILS_TOP_Y)
+
+    # === MAIN CONTENT ===
+    c.setFont(FONT_BOLD, 10)
+    c.setFillColor(COLOR_PRIMARY_GREEN)
+    c.drawCentredString(PAGE_WIDTH / 2, TITLE_Y, "DONATION RECEIPT")
+
+    c.setFont(FONT_REGULAR, 9)
+    c.setFillColor(COLOR_TEXT_GRAY)
+    c.drawString(X_MARGIN, APPRECIATION_Y, "WE SINCERELY APPRECIATE YOUR CONTRIBUTION FOR OUR MISSION.")
+
+    c.setFont(FONT_BOLD, 9)
+    c.setFillColor(COLOR_TEXT_DARK)
+    c.drawString(COL2_X, DETAILS_HEADING_Y, "RECEIPT DETAILS")
+    c.drawString(COL1_X, DETAILS_HEADING_Y, "DONOR DETAILS")
+
+    c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
+    c.drawString(COL2_X, _row_y(1), "RECEIPT NO"); c.drawString(COL1_X, _row_y(1), "ADDRESS")
+    c.drawString(COL2_X, _row_y(2), "PAYMENT DATE"); c.drawString(COL1_X, _row_y(2), "PAN")
+    c.drawString(COL1_X, _row_y(3), "PURPOSE")
+    c.drawString(COL1_X, _row_y(4), "AMOUNT")
+    c.drawString(COL1_X, _row_y(5), "IN WORDS")
+
+    c.line(X_MARGIN, _row_y(6), PAGE_WIDTH - X_MARGIN, _row_y(6))
+
+    # === FOOTER ===
+    c.drawImage(get_image_reader(SIGNATURE_PATH, SIG_WIDTH, SIG_HEIGHT), SIG_X, SIG_Y, width=SIG_WIDTH, height=SIG_HEIGHT, preserveAspectRatio=True, mask='auto')
+    c.setFont(FONT_REGULAR, 7)
+    c.setFillColor(COLOR_TEXT_GRAY)
+    c.drawCentredString(SIG_X + SIG_WIDTH/2, SIG_Y - 0.5*mm, "AUTHORISED SIGNATORY")
+
+    c.drawImage(get_image_reader(QR_CODE_PATH, QR_SIZE, QR_SIZE), QR_X, QR_Y, width=QR_SIZE, height=QR_SIZE, preserveAspectRatio=True, mask='auto')
+    c.drawCentredString(QR_X + QR_SIZE/2, QR_Y - 3*mm, "SCAN ME")
+
+    footer_lines = [
+        "THIS IS A COMPUTER-GENERATED RECEIPT.",
+        f"<font color='{COLOR_TEXT_DARK}'><b>ORG PAN: {org_pan.upper()}</b></font>",
+        "ALL DONATIONS ARE ELIGIBLE FOR TAX EXEMPTION UNDER SECTION 80G."
+    ]
+    p = Paragraph("<br/>".join(footer_lines), FOOTER_STYLE)
+    w, h = p.wrapOn(c, FOOTER_TEXT_WIDTH, FOOTER_H)
+    p.drawOn(c, FOOTER_TEXT_X, (FOOTER_H - h)/2)
+
+def _prepare_static_layer(c: canvas.Canvas, org_pan: str) -> str:
+    """
+    Records the static layer as a form XObject the first time it is needed on a
+    canvas, so a multi-page document embeds it (and its images) only once.
+    Returns the form name.
+    """
+    form_name = _static_form_name(org_pan)
+    if not c.hasForm(form_name):
+        c.beginForm(form_name, 0, 0, PAGE_WIDTH, PAGE_HEIGHT)
+        _draw_static_layer(c, org_pan)
+        c.endForm()
+    return form_name
+
+def _use_static_layer(c: canvas.Canvas, org_pan: str):
+    """Places the static layer on the current page."""
+    c.doForm(_prepare_static_layer(c, org_pan))
+
+def _amount_in_words(amount) -> str:
+    return f"{amount_to_words(int(amount)).title()} RUPEES ONLY."
+
+def _draw_receipt_fields(c: canvas.Canvas, data: ReceiptData, amount_words: str):
+    """Draws the per-donor values on top of the static layer."""
+    # Set default values for empty fields
+    name = data.name if data.name else "Donor"
+    address = data.address if data.address else "Tamil Nadu"
+    pan = data.pan if data.pan else "xxxxx1234x"
+
+    c.setFont(FONT_BOLD, 10)
+    c.setFillColor(COLOR_ACCENT_CORAL)
+    c.drawCentredString(SEC3_CENTER_X, HEADER_CENTER_Y - 3*mm, data.receipt_no.upper())
+
+    thank_you_message = f"DEAR, <font size=12><b>{name.upper()}!</b></font>"
+    p_message = Paragraph(thank_you_message, GREETING_STYLE)
+    p_message.wrapOn(c, CONTENT_WIDTH, 20*mm)
+    p_message.drawOn(c, X_MARGIN, GREETING_Y)
+
+    c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
+    value_x1 = COL1_X + VALUE_OFFSET
+    value_x2 = COL2_X + VALUE_OFFSET
+    c.drawString(value_x2, _row_y(1), f":  {data.receipt_no.upper()}"); c.drawString(value_x1, _row_y(1), f":  {address.upper()}")
+    c.drawString(value_x2, _row_y(2), f":  {data.date.upper()}"); c.drawString(value_x1, _row_y(2), f":  {pan.upper()}")
+    c.drawString(value_x1, _row_y(3), f":  {data.purpose.upper()}")
+    c.drawString(value_x1, _row_y(4), f": ₹ {str(data.amount).upper()}")
+    c.drawString(value_x1, _row_y(5), f":  {amount_words.upper()}")
+
+def draw_receipt(c: canvas.Canvas, data: ReceiptData):
+    """Draws one complete receipt onto the current page of a canvas."""
+    # Derived values are computed first so a bad record fails before anything is drawn.
+    amount_words = _amount_in_words(data.amount)
+    _use_static_layer(c, data.org_pan)
+    _draw_receipt_fields(c, data, amount_words)
+
+def receipt_filename(receipt_no: str) -> str:
+    """Sanitizes a receipt number into a valid PDF file name."""
+    sanitized_receipt_no = re.sub(r'[\\/:*?"<>|]', '_', receipt_no)
+    return f"{sanitized_receipt_no}.pdf"
+
+def render_receipt_bytes(data: ReceiptData) -> Optional[bytes]:
+    """
+    Renders a single receipt entirely in memory.
+
+    Args:
+        data (ReceiptData): An object containing all necessary info for the receipt.
+
+    Returns:
+        bytes: The PDF document on success.
+        None: On failure, or if the PDF exceeds RECEIPT_PDF_BYTE_BUDGET.
+    """
+    try:
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1)
+        draw_receipt(c, data)
+        c.save()
+        pdf_bytes = buffer.getvalue()
+        if RECEIPT_PDF_BYTE_BUDGET and len(pdf_bytes) > RECEIPT_PDF_BYTE_BUDGET:
+            print(f"❌ PDF for {data.receipt_no} is {len(pdf_bytes)} bytes, over the {RECEIPT_PDF_BYTE_BUDGET} byte budget.")
+            return None
+        return pdf_bytes
+    except Exception as e:
+        print(f"❌ PDF Generation Failed for {data.receipt_no}: {e}")
+        traceback.print_exc()
+        return None
+
+def receipt_cache_key(data: ReceiptData) -> str:
+    """Content hash of every receipt field plus the template version."""
+    payload = json.dumps([TEMPLATE_VERSION, asdict(data)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_receipt_bytes(data: ReceiptData) -> Optional[bytes]:
+    """
+    Returns the PDF for a receipt from the render cache, rendering and caching
+    it only if this exact content has not been rendered before.
+    """
+    key = receipt_cache_key(data)
+    pdf_bytes = get_cached_receipt(key)
+    if pdf_bytes is None:
+        with timed("pdf.render") as timing:
+            pdf_bytes = render_receipt_bytes(data)
+            timing.error = pdf_bytes is None
+        if pdf_bytes is not None:
+            store_receipt(key, data.receipt_no, pdf_bytes)
+    return pdf_bytes
+
+def save_receipt_pdf(data: ReceiptData, pdf_bytes: bytes, session_output_dir: str) -> Optional[str]:
+    """
+    Writes already-rendered receipt bytes into the session directory.
+
+    Returns:
+        str: The final path to the saved PDF on success.
+        None: On failure.
+    """
+    os.makedirs(session_output_dir, exist_ok=True)
+    final_pdf_path = os.path.join(session_output_dir, receipt_filename(data.receipt_no))
+    # Write next to the final path and rename, so readers never see a partial file.
+    temp_pdf_path = f"{final_pdf_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(temp_pdf_path, final_pdf_path)
+        return final_pdf_path
+    except Exception as e:
+        print(f"❌ Saving PDF Failed for {data.receipt_no}: {e}")
+        if os.path.exists(temp_pdf_path):
+            os.remove(temp_pdf_path)
+        return None
+
 def create_receipt_pdf(data: ReceiptData, session_output_dir: str):
     """
     Generates a PDF receipt from a ReceiptData object.
-    PDFs are saved into a session-specific directory.
+    PDFs are saved into a session-specific directory. Unchanged receipts are
+    served from the render cache; edited ones are re-rendered and overwrite
+    any older file for the same receipt number.
 
     Args:
         data (ReceiptData): An object containing all necessary info for the receipt.
@@ -65,192 +330,100 @@ def create_receipt_pdf(data: ReceiptData, session_output_dir: str):
 
     Returns:
         str: The final path to the generated PDF on success.
-        None: On failure or if the PDF already exists.
+        None: On failure.
     """
-    os.makedirs(session_output_dir, exist_ok=True)
-    # Sanitize the receipt number to make it a valid filename
-    sanitized_receipt_no = re.sub(r'[\\/:*?"<>|]', '_', data.receipt_no)
-    final_pdf_path = os.path.join(session_output_dir, f"{sanitized_receipt_no}.pdf")
-    if os.path.exists(final_pdf_path):
-        print(f"⚠️ PDF already exists for {data.receipt_no}. Skipping generation.")
-        return final_pdf_path
+    pdf_bytes = get_receipt_bytes(data)
+    if pdf_bytes is None:
+        return None
+    pdf_path = save_receipt_pdf(data, pdf_bytes, session_output_dir)
+    if pdf_path:
+        record_stored_file(session_output_dir, pdf_path, data.receipt_no)
+    return pdf_path
+
+def _sheet_grid(sheet_size: Tuple[float, float]) -> Tuple[Tuple[float, float], List[Tuple[float, float]]]:
+    """
+    Works out how many receipts fit on a print sheet, trying both orientations.
+    Returns the oriented sheet size and the lower-left origin of every slot,
+    top-to-bottom then left-to-right, with the grid centred on the sheet.
+    """
+    best = None
+    for sheet_w, sheet_h in (sheet_size, (sheet_size[1], sheet_size[0])):
+        cols, rows = int(sheet_w // PAGE_WIDTH), int(sheet_h // PAGE_HEIGHT)
+        if best is None or cols * rows > best[1] * best[2]:
+            best = ((sheet_w, sheet_h), cols, rows)
+    (sheet_w, sheet_h), cols, rows = best
+    if cols * rows == 0:
+        raise ValueError("Sheet is smaller than a single receipt.")
+
+    x0 = (sheet_w - cols * PAGE_WIDTH) / 2
+    y0 = (sheet_h - rows * PAGE_HEIGHT) / 2
+    slots = [
+        (x0 + col * PAGE_WIDTH, y0 + (rows - 1 - row) * PAGE_HEIGHT)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+    return (sheet_w, sheet_h), slots
+
+@instrumented("pdf.print_sheets", is_error=lambda result: bool(result[1]))
+def create_receipts_pdf(receipts: Iterable[ReceiptData],
+                        output: Union[str, BinaryIO],
+                        sheet_size: Optional[Tuple[float, float]] = None) -> Tuple[int, List[str]]:
+    """
+    Renders many receipts into a single multi-page PDF on one canvas, so the
+    fonts, images and static layer are embedded once for the whole batch.
 
-    temp_dir = tempfile.gettempdir()
-    temp_pdf_path = os.path.join(temp_dir, f"temp_{sanitized_receipt_no}_{os.getpid()}.pdf")
+    Args:
+        receipts (Iterable[ReceiptData]): Receipts to render, consumed lazily.
+        output (str | file-like): Destination path or binary file object.
+        sheet_size (tuple, optional): When given (e.g. reportlab's A4), receipts
+            are laid out N-up on sheets of this size for bulk printing instead
+            of one receipt per page.
 
-    try:
-        c = canvas.Canvas(temp_pdf_path, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
-
-        # Set default values for empty fields
-        name = data.name if data.name else "Donor"
-        address = data.address if data.address else "Tamil Nadu"
-        pan = data.pan if data.pan else "xxxxx1234x"
-
-        # --- Section Boundaries & Margins ---
-        X_MARGIN = 8 * mm
-        CONTENT_WIDTH = PAGE_WIDTH - (2 * X_MARGIN)
-        header_h = PAGE_HEIGHT * 0.20
-        footer_h = PAGE_HEIGHT * 0.20
-        header_top_y = PAGE_HEIGHT
-        details_top_y = header_top_y - header_h
-        footer_top_y = header_h
-
-        # --- Draw Backgrounds ---
-        c.setFillColor(COLOR_WHITE)
-        c.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, fill=1, stroke=0)
-        c.setFillColor(COLOR_BG_DARKER_GRAY)
-        c.rect(0, details_top_y, PAGE_WIDTH, header_h, fill=1, stroke=0)
-        c.setFillColor(COLOR_BG_DARKER_GRAY)
-        c.rect(0, 0, PAGE_WIDTH, footer_h, fill=1, stroke=0)
-
-        # === HEADER ===
-        header_content_width = PAGE_WIDTH - (2 * X_MARGIN)
-        sec1_width = header_content_width * 0.20
-        sec2_width = header_content_width * 0.60
-        sec3_width = header_content_width * 0.20
-        sec1_center_x = X_MARGIN + (sec1_width / 2)
-        sec2_center_x = X_MARGIN + sec1_width + (sec2_width / 2)
-        sec3_center_x = X_MARGIN + sec1_width + sec2_width + (sec3_width / 2)
-        header_content_area_height = 20 * mm
-        header_center_y = details_top_y + header_h - (header_content_area_height / 2) - (2*mm)
-
-        logo_size = 16 * mm
-        logo_x = sec1_center_x - (logo_size / 2)
-        logo_y = header_center_y - (logo_size / 2)
-        c.drawImage(LOGO_PATH, logo_x, logo_y, height=logo_size, width=logo_size, preserveAspectRatio=True, mask='auto')
-
-        c.setFont(FONT_BOLD, 28)
-        c.setFillColor(COLOR_TEXT_DARK)
-        c.drawCentredString(sec2_center_x, header_center_y + 0.5*mm, "HOPE TRUST")
-        c.setFont(FONT_REGULAR, 5)
-        c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawCentredString(sec2_center_x, header_center_y - 4.5*mm, "RECOGNIZED BY GOVT. OF TAMIL NADU")
-        c.setFont(FONT_BOLD, 6)
-        c.setFillColor(COLOR_TEXT_DARK)
-        c.drawCentredString(sec2_center_x, header_center_y - 7.5*mm, "REG. NO: 174/2017 | PH. NO: 7397271881")
-
-        c.setFont(FONT_REGULAR, 8)
-        c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawCentredString(sec3_center_x, header_center_y + 2*mm, "RECEIPT NO:")
-        c.setFont(FONT_BOLD, 10)
-        c.setFillColor(COLOR_ACCENT_CORAL)
-        c.drawCentredString(sec3_center_x, header_center_y - 3*mm, data.receipt_no.upper())
-
-        y_cursor = details_top_y
-        c.setStrokeColor(COLOR_BORDER_LIGHT)
-        c.setLineWidth(0.5)
-        c.line(X_MARGIN, y_cursor, PAGE_WIDTH - X_MARGIN, y_cursor)
-
-        # === MAIN CONTENT ===
-        y_cursor -= 7 * mm
-        c.setFont(FONT_BOLD, 10)
-        c.setFillColor(COLOR_PRIMARY_GREEN)
-        c.drawCentredString(PAGE_WIDTH / 2, y_cursor, "DONATION RECEIPT")
-
-        y_cursor -= 8 * mm
-        message_style = ParagraphStyle(name='ThankYouMessage', fontName=FONT_BOLD, fontSize=12, textColor=COLOR_ACCENT_CORAL)
-        thank_you_message = f"DEAR, <font size=12><b>{name.upper()}!</b></font>"
-        p_message = Paragraph(thank_you_message, message_style)
-        p_message.wrapOn(c, CONTENT_WIDTH, 20*mm)
-        p_message.drawOn(c, X_MARGIN, y_cursor)
-
-        y_cursor -= 6 * mm
-        c.setFont(FONT_REGULAR, 9)
-        c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(X_MARGIN, y_cursor, "WE SINCERELY APPRECIATE YOUR CONTRIBUTION FOR OUR MISSION.")
-
-        y_cursor -= 10 * mm
-        col1_x = X_MARGIN
-        col2_x = X_MARGIN + (CONTENT_WIDTH / 2)
-        line_height = 6 * mm
-
-        c.setFont(FONT_BOLD, 9)
-        c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col2_x, y_cursor, "RECEIPT DETAILS")
-        c.drawString(col1_x, y_cursor, "DONOR DETAILS")
-        y_cursor -= line_height
-
-        c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(col2_x, y_cursor, "RECEIPT NO"); c.drawString(col1_x, y_cursor, "ADDRESS")
-        c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col2_x + 25*mm, y_cursor, f":  {data.receipt_no.upper()}"); c.drawString(col1_x + 25*mm, y_cursor, f":  {address.upper()}")
-        y_cursor -= line_height
-
-        c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(col2_x, y_cursor, "PAYMENT DATE"); c.drawString(col1_x, y_cursor, "PAN")
-        c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col2_x + 25*mm, y_cursor, f":  {data.date.upper()}"); c.drawString(col1_x + 25*mm, y_cursor, f":  {pan.upper()}")
-        y_cursor -= line_height
-
-        c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(col1_x, y_cursor, "PURPOSE")
-        c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col1_x + 25*mm, y_cursor, f":  {data.purpose.upper()}")
-        y_cursor -= line_height
-
-        c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(col1_x, y_cursor, "AMOUNT")
-        c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col1_x + 25*mm, y_cursor, f": ₹ {str(data.amount).upper()}")
-        y_cursor -= line_height
-
-        c.setFont(FONT_REGULAR, 9); c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawString(col1_x, y_cursor, "IN WORDS")
-        amount_words = f"{num2words(int(data.amount), lang='en_IN').title()} RUPEES ONLY."
-        c.setFont(FONT_BOLD, 9); c.setFillColor(COLOR_TEXT_DARK)
-        c.drawString(col1_x + 25*mm, y_cursor, f":  {amount_words.upper()}")
-
-        y_cursor -= line_height
-        c.line(X_MARGIN, y_cursor, PAGE_WIDTH - X_MARGIN, y_cursor)
-
-        # === FOOTER ===
-        sig_width, sig_height = 30*mm, footer_h - 4*mm
-        qr_size = footer_h
-        sig_x = X_MARGIN
-        qr_x = PAGE_WIDTH - X_MARGIN - qr_size
-
-        sig_y = (footer_h - sig_height) / 2 + 2*mm
-        c.drawImage(SIGNATURE_PATH, sig_x, sig_y, width=sig_width, height=sig_height, preserveAspectRatio=True, mask='auto')
-        c.setFont(FONT_REGULAR, 7)
-        c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawCentredString(sig_x + sig_width/2, sig_y - 0.5*mm, "AUTHORISED SIGNATORY")
-
-        qr_y = (footer_h - qr_size) / 2 + 6*mm
-        c.drawImage(QR_CODE_PATH, qr_x, qr_y, width=qr_size, height=qr_size, preserveAspectRatio=True, mask='auto')
-        c.setFont(FONT_REGULAR, 7)
-        c.setFillColor(COLOR_TEXT_GRAY)
-        c.drawCentredString(qr_x + qr_size/2, qr_y - 3*mm, "SCAN ME")
-
-        text_x = sig_x + sig_width + 4*mm
-        text_width = qr_x - text_x - 4*mm
-
-        # --- Updated Footer ---
-        footer_lines = [
-            "THIS IS A COMPUTER-GENERATED RECEIPT.",
-            f"<font color='{COLOR_TEXT_DARK}'><b>ORG PAN: {data.org_pan.upper()}</b></font>",
-            "ALL DONATIONS ARE ELIGIBLE FOR TAX EXEMPTION UNDER SECTION 80G."
-        ]
-        footer_text = "<br/>".join(footer_lines)
-        footer_style = ParagraphStyle(
-            'footer',
-            fontName=FONT_REGULAR,
-            fontSize=7,
-            textColor=COLOR_TEXT_GRAY,
-            alignment=TA_CENTER,
-            leading=9
-        )
-        p = Paragraph(footer_text, footer_style)
-        w, h = p.wrapOn(c, text_width, footer_h)
-        p.drawOn(c, text_x, (footer_h - h)/2)
+    Returns:
+        tuple: (number_of_receipts_rendered, list_of_failed_receipt_numbers)
+    """
+    if sheet_size:
+        pagesize, slots = _sheet_grid(sheet_size)
+    else:
+        pagesize, slots = (PAGE_WIDTH, PAGE_HEIGHT), [(0, 0)]
 
+    rendered, failed = 0, []
+    slot_index = 0
+    try:
+        c = canvas.Canvas(output, pagesize=pagesize, pageCompression=1)
+        for index, data in enumerate(receipts):
+            # Each receipt is recorded as its own form and placed only if it drew
+            # completely, so a failure never leaves a half-drawn receipt in a slot.
+            form_name = f"Receipt{index}"
+            try:
+                _prepare_static_layer(c, data.org_pan)
+                c.beginForm(form_name, 0, 0, PAGE_WIDTH, PAGE_HEIGHT)
+                try:
+                    draw_receipt(c, data)
+                finally:
+                    c.endForm()
+            except Exception as e:
+                print(f"❌ PDF Generation Failed for {data.receipt_no}: {e}")
+                failed.append(data.receipt_no)
+                continue
+
+            if slot_index == len(slots):
+                c.showPage()
+                slot_index = 0
+            x, y = slots[slot_index]
+            c.saveState()
+            c.translate(x, y)
+            c.doForm(form_name)
+            c.restoreState()
+            rendered += 1
+            slot_index += 1
+        if rendered == 0:
+            return 0, failed
         c.save()
-        shutil.move(temp_pdf_path, final_pdf_path)
-        print(f"✅ Successfully generated and saved receipt: {final_pdf_path}")
-        return final_pdf_path
+        print(f"✅ Successfully generated combined PDF with {rendered} receipt(s).")
+        return rendered, failed
 
     except Exception as e:
-        print(f"❌ PDF Generation Failed for {data.receipt_no}: {e}")
+        print(f"❌ Combined PDF Generation Failed: {e}")
         traceback.print_exc()
-        if os.path.exists(temp_pdf_path):
-            os.remove(temp_pdf_path)
-        return None
\ No newline at end of file
+        return 0, failed
@@ -0,0 +1,121 @@
+# app/perf_metrics.py
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# Process-wide latency histograms for Supabase calls, PDF renders and ZIP
+# builds, shown on the admin performance page.
+#
+# Latencies go into fixed log-spaced buckets (each 10% wider than the last,
+# 0.1 ms to ~2 min), so recording is O(log buckets), memory is constant and
+# percentiles are accurate to within one bucket.
+_BUCKET_BOUNDS: List[float] = []
+_bound = 0.0001
+while _bound < 120:
+    _BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.1
+
+class _Histogram:
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def record(self, seconds: float, error: bool):
+        self.count += 1
+        self.errors += int(error)
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile, capped at the observed max."""
+        target = pct / 100 * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return min(self.max, _BUCKET_BOUNDS[index]) if index < len(_BUCKET_BOUNDS) else self.max
+        return self.max
+
+_histograms: Dict[str, _Histogram] = {}
+_lock = threading.Lock()
+
+def record_latency(name: str, seconds: float, error: bool = False):
+    """Adds one timed call to the histogram for `name`."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.record(seconds, error)
+
+class _Timing:
+    """Handle yielded by timed(); set `error = True` for calls that fail without raising."""
+    __slots__ = ("error",)
+
+    def __init__(self):
+        self.error = False
+
+@contextmanager
+def timed(name: str):
+    """
+    Times the block and records it under `name`. An exception counts as an error.
+
+    Usage:
+        with timed("rpc.mark_report_true") as timing:
+            ok = ...
+            timing.error = not ok
+    """
+    timing = _Timing()
+    start = time.perf_counter()
+    try:
+        yield timing
+    except BaseException:
+        timing.error = True
+        raise
+    finally:
+        record_latency(name, time.perf_counter() - start, timing.error)
+
+def instrumented(name: str, is_error: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator that times every call of a function under `name`. `is_error`
+    inspects the return value for functions that report failure instead of
+    raising, e.g. `lambda result: not result[0]` for (success, data) tuples.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name) as timing:
+                result = fn(*args, **kwargs)
+                timing.error = bool(is_error and is_error(result))
+                return result
+        return wrapper
+    return decorator
+
+def metrics_snapshot() -> List[Dict[str, Any]]:
+    """Returns one row per metric with count, errors and mean/p50/p95/p99/max latency in milliseconds."""
+    with _lock:
+        rows = []
+        for name, histogram in sorted(_histograms.items()):
+            rows.append({
+                "metric": name,
+                "count": histogram.count,
+                "errors": histogram.errors,
+                "mean_ms": round(histogram.total / histogram.count * 1000, 2),
+                "p50_ms": round(histogram.percentile(50) * 1000, 2),
+                "p95_ms": round(histogram.percentile(95) * 1000, 2),
+                "p99_ms": round(histogram.percentile(99) * 1000, 2),
+                "max_ms": round(histogram.max * 1000, 2),
+            })
+        return rows
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
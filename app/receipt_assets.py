@@ -0,0 +1,37 @@
+# app/receipt_assets.py
+from typing import Dict, Tuple
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.units import inch
+
+# Print resolution the receipt images are downsampled to. The source PNGs are
+# far larger than the few millimetres they occupy on a receipt.
+RECEIPT_IMAGE_DPI = 300
+
+_image_reader_cache: Dict[Tuple[str, int, int], ImageReader] = {}
+
+def _target_pixels(width_pt: float, height_pt: float, dpi: int) -> Tuple[int, int]:
+    """Converts a drawing box in PDF points to a pixel size at the given DPI."""
+    return max(1, round(width_pt / inch * dpi)), max(1, round(height_pt / inch * dpi))
+
+def get_image_reader(path: str, width_pt: float, height_pt: float, dpi: int = RECEIPT_IMAGE_DPI) -> ImageReader:
+    """
+    Returns a decoded, downsampled ImageReader for an image drawn into a
+    width_pt x height_pt box. Images are decoded once per process and cached.
+    Images already smaller than the box at the target DPI are left as they are.
+    """
+    max_w, max_h = _target_pixels(width_pt, height_pt, dpi)
+    key = (path, max_w, max_h)
+    reader = _image_reader_cache.get(key)
+    if reader is None:
+        with Image.open(path) as img:
+            img.load()
+            if img.width > max_w or img.height > max_h:
+                img = img.copy()
+                # thumbnail() keeps the aspect ratio, matching preserveAspectRatio=True.
+                img.thumbnail((max_w, max_h), Image.LANCZOS)
+            reader = ImageReader(img)
+        _image_reader_cache[key] = reader
+        print(f"✅ Prepared receipt image {path} at {reader.getSize()[0]}x{reader.getSize()[1]}px.")
+    return reader
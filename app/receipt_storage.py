@@ -0,0 +1,173 @@
+# app/receipt_storage.py
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from config import BASE_PDF_OUTPUT_DIR, PDF_STORAGE_QUOTA_BYTES, PDF_STORAGE_GRACE_SECONDS
+from sqlite_store import ThreadLocalSQLite
+
+# Session folders are sharded by year/month under BASE_PDF_OUTPUT_DIR, e.g.
+#   ht_donation_receipt/2025/08/ht_donation_receipt_2025-08-15_10-30-00/ONL-0001.pdf
+# and every stored file is recorded in a SQLite index next to them, so quota
+# checks and receipt lookups never have to scan the disk. Triggers keep the
+# total size of all files in `usage`, so checking the quota is one row read.
+INDEX_PATH = os.path.join(BASE_PDF_OUTPUT_DIR, "receipt_index.sqlite3")
+SESSION_DIR_PREFIX = "ht_donation_receipt_"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_dir TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    session_dir TEXT NOT NULL,
+    receipt_no TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_receipt ON files (receipt_no, stored_at);
+CREATE INDEX IF NOT EXISTS files_by_session ON files (session_dir);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS files_added AFTER INSERT ON files
+BEGIN UPDATE usage SET bytes = bytes + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS files_resized AFTER UPDATE OF size ON files
+BEGIN UPDATE usage SET bytes = bytes + NEW.size - OLD.size; END;
+CREATE TRIGGER IF NOT EXISTS files_removed AFTER DELETE ON files
+BEGIN UPDATE usage SET bytes = bytes - OLD.size; END;
+INSERT OR IGNORE INTO usage SELECT 0, COALESCE(SUM(size), 0) FROM files;
+"""
+# Upsert rather than INSERT OR REPLACE, which would bypass the delete trigger.
+_UPSERT_FILE = (
+    "INSERT INTO files VALUES (?, ?, ?, ?, ?) ON CONFLICT (path) DO UPDATE SET "
+    "session_dir = excluded.session_dir, receipt_no = excluded.receipt_no, "
+    "size = excluded.size, stored_at = excluded.stored_at"
+)
+
+def _register_untracked_sessions(conn: sqlite3.Connection):
+    """One-time import of session folders written before the index existed."""
+    for root, dirs, _ in os.walk(BASE_PDF_OUTPUT_DIR):
+        for name in [d for d in dirs if d.startswith(SESSION_DIR_PREFIX)]:
+            session_dir = os.path.join(root, name)
+            mtime = os.path.getmtime(session_dir)
+            conn.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)", (session_dir, mtime, mtime))
+            for entry in os.scandir(session_dir):
+                if entry.is_file():
+                    conn.execute(_UPSERT_FILE, (entry.path, session_dir, None, entry.stat().st_size, mtime))
+        dirs[:] = [d for d in dirs if not d.startswith(SESSION_DIR_PREFIX)]
+    conn.commit()
+
+# Yields this thread's connection to the index inside a transaction.
+_index = ThreadLocalSQLite(INDEX_PATH, _SCHEMA, on_create=_register_untracked_sessions).transaction
+
+def new_session_dir() -> str:
+    """Creates and registers a new timestamped session folder in this month's shard."""
+    now = datetime.now()
+    session_dir = os.path.join(BASE_PDF_OUTPUT_DIR, now.strftime("%Y"), now.strftime("%m"),
+                               f"{SESSION_DIR_PREFIX}{now.strftime('%Y-%m-%d_%H-%M-%S')}")
+    os.makedirs(session_dir, exist_ok=True)
+    with _index() as conn:
+        conn.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)", (session_dir, time.time(), time.time()))
+    return session_dir
+
+def ensure_session_dir(session_dir: Optional[str]) -> str:
+    """
+    Returns `session_dir` if it still exists, marking it as used so it stays in
+    the quota's grace window, or a new session folder if it was never created
+    or has since been evicted. Call it before writing a batch.
+    """
+    if session_dir and os.path.isdir(session_dir):
+        now = time.time()
+        with _index() as conn:
+            conn.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)", (session_dir, now, now))
+            conn.execute("UPDATE sessions SET last_access = ? WHERE session_dir = ?", (now, session_dir))
+        return session_dir
+    if session_dir:
+        print(f"⚠️ Session folder {session_dir} was evicted. Starting a new one.")
+    return new_session_dir()
+
+def new_batch_zip_path(session_dir: str) -> str:
+    """
+    Returns a path for a batch ZIP in the session folder. The random suffix keeps
+    two batches started in the same second (the folder name has only seconds)
+    from writing to the same file.
+    """
+    stamp = datetime.now().strftime('%H-%M-%S')
+    return os.path.join(session_dir, f"{os.path.basename(session_dir)}_{stamp}_{uuid.uuid4().hex[:8]}.zip")
+
+def record_stored_files(session_dir: str, files: Iterable[Tuple[str, Optional[str]]]):
+    """
+    Records files written into a session folder as (path, receipt_no) pairs,
+    marks the session as recently used and evicts old sessions if the store
+    is over quota. Batch callers should record a whole batch in one call.
+    """
+    now = time.time()
+    rows = [
+        (path, session_dir, receipt_no.strip().upper() if receipt_no else None, os.path.getsize(path), now)
+        for path, receipt_no in files
+    ]
+    with _index() as conn:
+        conn.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)", (session_dir, now, now))
+        conn.execute("UPDATE sessions SET last_access = ? WHERE session_dir = ?", (now, session_dir))
+        conn.executemany(_UPSERT_FILE, rows)
+    enforce_quota(protect=session_dir)
+
+def record_stored_file(session_dir: str, path: str, receipt_no: Optional[str] = None):
+    """Records a single file written into a session folder. See record_stored_files."""
+    record_stored_files(session_dir, [(path, receipt_no)])
+
+def find_stored_receipt(receipt_no: str) -> Optional[str]:
+    """Returns the most recently stored PDF for a receipt number, if it is still on disk."""
+    with _index() as conn:
+        row = conn.execute(
+            "SELECT path FROM files WHERE receipt_no = ? ORDER BY stored_at DESC LIMIT 1",
+            (receipt_no.strip().upper(),)
+        ).fetchone()
+    if row and os.path.exists(row[0]):
+        return row[0]
+    return None
+
+def storage_usage_bytes() -> int:
+    with _index() as conn:
+        return conn.execute("SELECT bytes FROM usage").fetchone()[0]
+
+def enforce_quota(protect: Optional[str] = None, quota_bytes: int = PDF_STORAGE_QUOTA_BYTES,
+                  grace_seconds: float = PDF_STORAGE_GRACE_SECONDS) -> int:
+    """
+    Deletes least recently used session folders until the store fits the quota.
+    The `protect` session (the one currently being written) and every session
+    used within `grace_seconds` (possibly still being written or downloaded by
+    another user) are never evicted, even if the store stays over quota.
+    Returns the number of sessions evicted.
+    """
+    if not quota_bytes:
+        return 0
+    evicted = 0
+    with _index() as conn:
+        used = conn.execute("SELECT bytes FROM usage").fetchone()[0]
+        if used <= quota_bytes:
+            return 0
+        candidates = conn.execute(
+            "SELECT s.session_dir, COALESCE(SUM(f.size), 0) FROM sessions s "
+            "LEFT JOIN files f ON f.session_dir = s.session_dir "
+            "WHERE s.session_dir != ? AND s.last_access < ? GROUP BY s.session_dir ORDER BY s.last_access ASC",
+            (protect or "", time.time() - grace_seconds)
+        ).fetchall()
+        for session_dir, size in candidates:
+            if used <= quota_bytes:
+                break
+            shutil.rmtree(session_dir, ignore_errors=True)
+            conn.execute("DELETE FROM files WHERE session_dir = ?", (session_dir,))
+            conn.execute("DELETE FROM sessions WHERE session_dir = ?", (session_dir,))
+            used -= size
+            evicted += 1
+            print(f"🗑️ Evicted receipt session {session_dir} ({size} bytes) to stay within the storage quota.")
+    return evicted
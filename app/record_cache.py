@@ -0,0 +1,65 @@
+# app/record_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import RECORD_CACHE_TTL_SECONDS, RECORD_CACHE_MAX_ENTRIES
+
+# Process-wide TTL + LRU cache of Hope_Trust rows fetched by receipt number,
+# shared by every Streamlit session. Only found records are cached, so a
+# receipt created after a failed lookup is never hidden. Writes through
+# supabase_client invalidate the affected receipt. Keys are receipt numbers
+# stripped and upper-cased, so ' onl-0001' and 'ONL-0001' share one entry.
+_records: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0}
+_lock = threading.Lock()
+
+def _key(receipt_no: str) -> str:
+    return str(receipt_no).strip().upper()
+
+def get_cached_record(receipt_no: str) -> Optional[Dict[str, Any]]:
+    """Returns a copy of the cached record, or None on a miss or expired entry."""
+    receipt_no = _key(receipt_no)
+    with _lock:
+        entry = _records.get(receipt_no)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        stored_at, record = entry
+        if time.monotonic() - stored_at > RECORD_CACHE_TTL_SECONDS:
+            del _records[receipt_no]
+            _stats["expired"] += 1
+            _stats["misses"] += 1
+            return None
+        _records.move_to_end(receipt_no)
+        _stats["hits"] += 1
+        return dict(record)
+
+def store_record(receipt_no: str, record: Dict[str, Any]):
+    """Caches a record, evicting the least recently used entries over the size limit."""
+    if RECORD_CACHE_TTL_SECONDS <= 0 or RECORD_CACHE_MAX_ENTRIES <= 0:
+        return
+    receipt_no = _key(receipt_no)
+    with _lock:
+        _records[receipt_no] = (time.monotonic(), dict(record))
+        _records.move_to_end(receipt_no)
+        while len(_records) > RECORD_CACHE_MAX_ENTRIES:
+            _records.popitem(last=False)
+
+def invalidate_record(receipt_no: str):
+    """Drops a receipt's cached record, e.g. after it was written to."""
+    receipt_no = _key(receipt_no)
+    with _lock:
+        if _records.pop(receipt_no, None) is not None:
+            _stats["invalidations"] += 1
+
+def record_cache_stats() -> Dict[str, Any]:
+    """Returns hit/miss counters, the hit ratio and the current number of entries."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "entries": len(_records),
+            "hit_ratio": round(_stats["hits"] / lookups, 3) if lookups else 0.0
+        }
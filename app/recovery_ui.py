@@ -1,16 +1,21 @@
 # app/recovery_ui.py
 import streamlit as st
 from datetime import datetime
-from app.supabase_client import fetch_missing_receipts, set_receipt_generated_flag
-from app.pdf_generator import create_receipt_pdf, ReceiptData
-from app.config import (
+from supabase_client import count_missing_receipts, fetch_missing_receipts
+from db_outbox import enqueue_report_flags
+from pdf_generator import create_receipts_pdf, ReceiptData
+from render_pool import render_receipts
+from config import (
     APP_TITLE_PREFIX, DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT,
     PAD_Y_LARGE, PAD_Y_MEDIUM, PAD_Y_SMALL, PAD_X_MEDIUM,
     UI_BACKGROUND_LIGHT, UI_PRIMARY_COLOR, UI_ACCENT_COLOR, UI_WARNING_COLOR, UI_ERROR_COLOR,
-    UI_TEXT_PRIMARY, UI_TEXT_SECONDARY, UI_TEXT_ON_PRIMARY, BASE_PDF_OUTPUT_DIR
+    UI_TEXT_PRIMARY, UI_TEXT_SECONDARY, UI_TEXT_ON_PRIMARY, RECOVERY_MAX_RECORDS
 )
 import os
-from app.zip_utils import create_zip_from_directory
+import io
+from reportlab.lib.pagesizes import A4
+from zip_utils import ZipArchiveWriter
+from receipt_storage import new_session_dir, ensure_session_dir, new_batch_zip_path, record_stored_file
 
 def recovery_page():
     # Initialize state
@@ -22,6 +27,12 @@ def recovery_page():
         st.session_state.selected_receipts = []
     if 'generated_receipts_info' not in st.session_state:
         st.session_state.generated_receipts_info = []
+    if 'recovery_print_sheets' not in st.session_state:
+        st.session_state.recovery_print_sheets = None
+    if 'recovery_zip_path' not in st.session_state:
+        st.session_state.recovery_zip_path = None
+    if 'recovery_total_missing' not in st.session_state:
+        st.session_state.recovery_total_missing = 0
 
     # State Machine
     if st.session_state.recovery_page_state == 'initial':
@@ -33,19 +44,20 @@ def recovery_page():
     elif st.session_state.recovery_page_state == 'fetching':
         # === PDF Session Directory Initialization ===
         if not st.session_state.get('current_pdf_session_dir'):
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            session_dir_name = f"ht_donation_receipt_{timestamp}"
-            full_session_dir_path = os.path.join(BASE_PDF_OUTPUT_DIR, session_dir_name)
-            os.makedirs(full_session_dir_path, exist_ok=True)
-            st.session_state['current_pdf_session_dir'] = full_session_dir_path
-            st.info(f"PDFs for this session will be saved in: {full_session_dir_path}", icon="🗂️")
+            st.session_state['current_pdf_session_dir'] = new_session_dir()
+            st.info(f"PDFs for this session will be saved in: {st.session_state['current_pdf_session_dir']}", icon="🗂️")
 
         with st.spinner("⏳ Fetching missing receipts..."):
-            success, data = fetch_missing_receipts()
+            count_ok, missing_count = count_missing_receipts()
+            if count_ok and missing_count == 0:
+                success, data = True, []
+            else:
+                success, data = fetch_missing_receipts(limit=RECOVERY_MAX_RECORDS)
             if success:
                 st.session_state.recovery_data = data
             else:
                 st.session_state.recovery_data = []
+            st.session_state.recovery_total_missing = missing_count if count_ok else len(st.session_state.recovery_data)
             st.session_state.recovery_page_state = 'show_list'
             st.rerun()
 
@@ -57,22 +69,29 @@ def recovery_page():
                 st.rerun()
         else:
             st.success(f"✅ Found {len(st.session_state.recovery_data)} record(s) to regenerate. Please select from the list below.")
+            if st.session_state.recovery_total_missing > len(st.session_state.recovery_data):
+                st.info(f"Showing the first {len(st.session_state.recovery_data)} of {st.session_state.recovery_total_missing} missing receipts. Regenerate these, then fetch again for the rest.")
             display_list = [
                 f"{item.get('receipt_no', 'N/A')} - {item.get('name', 'N/A')} - ₹{item.get('amount', 0):,.2f} - {item.get('date', 'N/A')}"
                 for item in st.session_state.recovery_data
             ]
             st.session_state.selected_receipts = st.multiselect("Select receipts to regenerate:", options=display_list)
+            # Print sheets draw every receipt again in this process, so they are opt-in.
+            build_print_sheets = st.checkbox("Also build A4 print sheets")
 
             if st.button("Regenerate Selected"):
                 if not st.session_state.selected_receipts:
                     st.warning("Please select at least one receipt to regenerate.")
                 else:
+                    st.session_state.recovery_build_print_sheets = build_print_sheets
                     st.session_state.recovery_page_state = 'processing'
                     st.rerun()
 
     elif st.session_state.recovery_page_state == 'processing':
         successful_generations = 0
         st.session_state.generated_receipts_info = []
+        generated_receipts = []
+        pending_receipts = []
         total_selected = len(st.session_state.selected_receipts)
         data = st.session_state.recovery_data
         
@@ -107,19 +126,44 @@ def recovery_page():
                 address=address,
                 pan=pan
             )
-
-            pdf_path = create_receipt_pdf(receipt_data, st.session_state['current_pdf_session_dir'])
-
-            if pdf_path:
-                if set_receipt_generated_flag(receipt_no):
-                    successful_generations += 1
-                    st.session_state.generated_receipts_info.append(display_str)
-                else:
-                    st.warning(f"⚠️ Generated PDF for {receipt_no}, but FAILED to update DB flag.")
+            pending_receipts.append((display_str, receipt_data))
+
+        # Each receipt is appended to this batch's ZIP as soon as it is rendered.
+        # The folder may have been evicted while the page sat idle.
+        session_dir = ensure_session_dir(st.session_state.get('current_pdf_session_dir'))
+        st.session_state['current_pdf_session_dir'] = session_dir
+        batch_zip_path = new_batch_zip_path(session_dir)
+        with st.spinner(f"⏳ Generating {len(pending_receipts)} PDF(s)..."), ZipArchiveWriter(batch_zip_path) as archive:
+            render_results = render_receipts(
+                [receipt_data for _, receipt_data in pending_receipts],
+                session_dir,
+                archive=archive
+            )
+        record_stored_file(session_dir, batch_zip_path)
+        st.session_state.recovery_zip_path = batch_zip_path if archive.count else None
+
+        # The 'report' flags are sent by the outbox in the background and retried until they succeed.
+        enqueue_report_flags([
+            receipt_data.receipt_no
+            for (_, receipt_data), (rendered_ok, _) in zip(pending_receipts, render_results) if rendered_ok
+        ])
+        for (display_str, receipt_data), (rendered_ok, _) in zip(pending_receipts, render_results):
+            receipt_no = receipt_data.receipt_no
+            if rendered_ok:
+                successful_generations += 1
+                st.session_state.generated_receipts_info.append(display_str)
+                generated_receipts.append(receipt_data)
             else:
                 st.error(f"❌ Failed to generate PDF for: {receipt_no}")
 
         st.info(f"✅ Generated {successful_generations}/{total_selected} PDFs.")
+        # Build the A4 print sheets once here, if asked for; 'finished' reruns only serve the bytes.
+        st.session_state.recovery_print_sheets = None
+        if generated_receipts and st.session_state.get('recovery_build_print_sheets'):
+            sheets_buffer = io.BytesIO()
+            with st.spinner(f"⏳ Building print sheets for {len(generated_receipts)} receipt(s)..."):
+                rendered, _ = create_receipts_pdf(generated_receipts, sheets_buffer, sheet_size=A4)
+            st.session_state.recovery_print_sheets = sheets_buffer.getvalue() if rendered else None
         st.session_state.recovery_page_state = 'finished'
         st.rerun()
 
@@ -130,21 +174,30 @@ def recovery_page():
             st.write(item)
 
         # --- Download as ZIP ---
-        if st.session_state.generated_receipts_info:
-            zip_bytes = create_zip_from_directory(st.session_state['current_pdf_session_dir'])
-            if zip_bytes:
+        if st.session_state.generated_receipts_info and st.session_state.recovery_zip_path:
+            with open(st.session_state.recovery_zip_path, "rb") as zip_file:
                 st.download_button(
                     label="Download All as ZIP",
-                    data=zip_bytes,
-                    file_name=f"{os.path.basename(st.session_state['current_pdf_session_dir'])}.zip",
+                    data=zip_file,
+                    file_name=os.path.basename(st.session_state.recovery_zip_path),
                     mime="application/zip"
                 )
+        if st.session_state.recovery_print_sheets:
+            st.download_button(
+                label="Download Print Sheets (A4)",
+                data=st.session_state.recovery_print_sheets,
+                file_name=f"{os.path.basename(st.session_state['current_pdf_session_dir'])}_print.pdf",
+                mime="application/pdf"
+            )
 
         if st.button("Regenerate More"):
             st.session_state.recovery_page_state = 'initial'
             st.session_state.selected_receipts = []
             st.session_state.recovery_data = []
             st.session_state.generated_receipts_info = []
+            st.session_state.recovery_print_sheets = None
+            st.session_state.recovery_zip_path = None
+            st.session_state.recovery_total_missing = 0
             st.rerun()
 
     # Navigation buttons
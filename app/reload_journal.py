@@ -0,0 +1,49 @@
+# app/reload_journal.py
+import threading
+from typing import Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class ReloadJournal:
+    """
+    Lets an in-memory index be rebuilt from a slow source while it keeps
+    serving. Changes applied to the live index during the rebuild are
+    recorded and replayed onto the new one just before it is swapped in.
+
+    Args:
+        lock (threading.Lock): Guards the live index. Hold it while applying a
+            change and calling record().
+    """
+    def __init__(self, lock: threading.Lock):
+        self.lock = lock
+        self._entries: Optional[List[tuple]] = None
+
+    def record(self, *entry):
+        """Records a change if a rebuild is running. The caller holds `lock`."""
+        if self._entries is not None:
+            self._entries.append(entry)
+
+    def rebuild(self, build: Callable[[], T], replay: Callable[[T, tuple], None],
+                swap: Callable[[T], None]) -> T:
+        """
+        Runs `build()` without the lock, then, under it, replays every recorded
+        change onto the result and passes it to `swap`. If `build` raises, the
+        live index is left as it was.
+
+        Returns:
+            The newly built index.
+        """
+        with self.lock:
+            self._entries = []
+        try:
+            index = build()
+        except Exception:
+            with self.lock:
+                self._entries = None
+            raise
+        with self.lock:
+            for entry in self._entries:
+                replay(index, entry)
+            self._entries = None
+            swap(index)
+        return index
@@ -0,0 +1,55 @@
+# app/render_cache.py
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from config import RENDER_CACHE_MAX_BYTES
+
+# Process-wide LRU of rendered receipt PDFs, keyed by a content hash of the
+# receipt fields and template version. Shared by every Streamlit session.
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_keys_by_receipt: Dict[str, Set[str]] = {}
+_receipt_by_key: Dict[str, str] = {}
+_cache_bytes = 0
+_lock = threading.Lock()
+
+def _drop(key: str):
+    global _cache_bytes
+    pdf_bytes = _cache.pop(key)
+    _cache_bytes -= len(pdf_bytes)
+    receipt_no = _receipt_by_key.pop(key)
+    keys = _keys_by_receipt[receipt_no]
+    keys.discard(key)
+    if not keys:
+        del _keys_by_receipt[receipt_no]
+
+def get_cached_receipt(key: str) -> Optional[bytes]:
+    """Returns the cached PDF for a content key, or None on a miss."""
+    with _lock:
+        pdf_bytes = _cache.get(key)
+        if pdf_bytes is not None:
+            _cache.move_to_end(key)
+        return pdf_bytes
+
+def store_receipt(key: str, receipt_no: str, pdf_bytes: bytes):
+    """Caches a rendered PDF, evicting the least recently used entries over the byte limit."""
+    global _cache_bytes
+    if len(pdf_bytes) > RENDER_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return
+        _cache[key] = pdf_bytes
+        _cache_bytes += len(pdf_bytes)
+        receipt_no = receipt_no.strip().upper()
+        _receipt_by_key[key] = receipt_no
+        _keys_by_receipt.setdefault(receipt_no, set()).add(key)
+        while _cache_bytes > RENDER_CACHE_MAX_BYTES:
+            _drop(next(iter(_cache)))
+
+def mark_receipt_dirty(receipt_no: str):
+    """Drops every cached rendering of a receipt, e.g. after its record was edited."""
+    with _lock:
+        for key in list(_keys_by_receipt.get(receipt_no.strip().upper(), ())):
+            _drop(key)
@@ -0,0 +1,145 @@
+# app/render_pool.py
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple, Union
+
+from config import PDF_RENDER_WORKERS
+from pdf_generator import (
+    create_receipts_pdf, render_receipt_bytes, save_receipt_pdf, receipt_cache_key, receipt_filename, ReceiptData
+)
+from zip_utils import ZipArchiveWriter
+from receipt_storage import record_stored_files
+from render_cache import get_cached_receipt, store_receipt
+from perf_metrics import record_latency
+
+_render_pool_instance: Optional[ProcessPoolExecutor] = None
+_render_pool_workers = 0
+
+def _warm_worker():
+    """
+    Runs once in every worker process. Rendering a throwaway receipt fills the
+    per-process caches (downsampled images in receipt_assets, parsed font
+    files, lazily imported ReportLab modules). The static-layer form is
+    recorded per document, so every receipt still draws its own.
+    """
+    warm_up = ReceiptData(receipt_no="WARMUP", date="01-01-2000", name="Donor",
+                          amount=1, address="", pan="")
+    create_receipts_pdf([warm_up], io.BytesIO())
+
+def _render_one(data: ReceiptData) -> Tuple[bool, Union[bytes, str], float]:
+    """Renders one receipt and reports how long it took, so workers' timings reach the parent's metrics."""
+    start = time.perf_counter()
+    try:
+        pdf_bytes = render_receipt_bytes(data)
+    except Exception as e:
+        return False, str(e), time.perf_counter() - start
+    if pdf_bytes:
+        return True, pdf_bytes, time.perf_counter() - start
+    return False, "PDF generation failed.", time.perf_counter() - start
+
+def _reset_render_pool(error: Exception):
+    global _render_pool_instance
+    print(f"⚠️ Render pool failed ({error}). Falling back to in-process rendering.")
+    _render_pool_instance = None
+
+def get_render_pool(workers: int = PDF_RENDER_WORKERS) -> ProcessPoolExecutor:
+    """Returns the process-wide render pool, kept alive so workers stay warm."""
+    global _render_pool_instance, _render_pool_workers
+    if _render_pool_instance is None or _render_pool_workers != workers:
+        if _render_pool_instance is not None:
+            _render_pool_instance.shutdown(wait=False)
+        # Streamlit serves sessions from threads, and forking a threaded
+        # process can copy a lock mid-acquire; forkserver children start clean.
+        _render_pool_instance = ProcessPoolExecutor(
+            max_workers=workers, initializer=_warm_worker,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+        _render_pool_workers = workers
+    return _render_pool_instance
+
+def _iter_render_results(receipts: List[ReceiptData], workers: Optional[int]) -> Iterator[Tuple[bool, Union[bytes, str]]]:
+    """
+    Yields one result per receipt in input order, each as soon as it is ready.
+    Receipts whose content is already in the render cache are served from it
+    and only the rest go to the worker processes. Caching happens here in the
+    parent so every session shares it.
+    """
+    workers = workers or PDF_RENDER_WORKERS
+    keys = [receipt_cache_key(data) for data in receipts]
+    cached = [get_cached_receipt(key) for key in keys]
+    to_render = [data for data, pdf_bytes in zip(receipts, cached) if pdf_bytes is None]
+
+    if workers <= 1 or len(to_render) <= 1:
+        rendered = map(_render_one, to_render)
+    else:
+        chunksize = max(1, len(to_render) // (workers * 4))
+        try:
+            rendered = get_render_pool(workers).map(_render_one, to_render, chunksize=chunksize)
+        except BrokenProcessPool as e:
+            _reset_render_pool(e)
+            rendered = map(_render_one, to_render)
+
+    rendered_count = 0
+    for data, key, pdf_bytes in zip(receipts, keys, cached):
+        if pdf_bytes is not None:
+            yield True, pdf_bytes
+            continue
+        try:
+            result = next(rendered)
+        except BrokenProcessPool as e:
+            _reset_render_pool(e)
+            rendered = map(_render_one, to_render[rendered_count + 1:])
+            result = _render_one(data)
+        rendered_count += 1
+        ok, pdf_bytes_or_error, seconds = result
+        record_latency("pdf.render", seconds, error=not ok)
+        if ok:
+            store_receipt(key, data.receipt_no, pdf_bytes_or_error)
+        yield ok, pdf_bytes_or_error
+
+def render_receipts(receipts: List[ReceiptData], session_output_dir: str,
+                    workers: Optional[int] = None,
+                    archive: Optional[ZipArchiveWriter] = None) -> List[Tuple[bool, str]]:
+    """
+    Renders a batch of receipts into the session directory across worker processes.
+
+    Args:
+        receipts (List[ReceiptData]): The receipts to render.
+        session_output_dir (str): The path to the current session's output directory.
+        workers (int, optional): Worker process count. Defaults to PDF_RENDER_WORKERS.
+        archive (ZipArchiveWriter, optional): Every successfully saved receipt is
+            also appended to this archive as soon as it is produced.
+
+    Returns:
+        List[Tuple[bool, str]]: One (success, pdf_path_or_error) per receipt, in input order.
+    """
+    results, stored = [], []
+    for data, (ok, result) in zip(receipts, _iter_render_results(receipts, workers)):
+        if ok:
+            pdf_bytes = result
+            pdf_path = save_receipt_pdf(data, pdf_bytes, session_output_dir)
+            ok = bool(pdf_path)
+            result = pdf_path if pdf_path else "Saving PDF failed."
+            if ok:
+                stored.append((pdf_path, data.receipt_no))
+                if archive is not None:
+                    archive.add_bytes(receipt_filename(data.receipt_no), pdf_bytes)
+        results.append((ok, result))
+    if stored:
+        record_stored_files(session_output_dir, stored)
+        print(f"✅ Saved {len(stored)}/{len(receipts)} receipt PDF(s) to {session_output_dir}")
+    return results
+
+def render_receipts_bytes(receipts: List[ReceiptData],
+                          workers: Optional[int] = None) -> List[Tuple[bool, Union[bytes, str]]]:
+    """
+    Renders a batch of receipts in memory across worker processes, without
+    touching the filesystem.
+
+    Returns:
+        List[Tuple[bool, bytes | str]]: One (success, pdf_bytes_or_error) per receipt, in input order.
+    """
+    return list(_iter_render_results(receipts, workers))
@@ -0,0 +1,229 @@
+# app/replica.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config import BASE_PDF_OUTPUT_DIR, REPLICA_MAX_STALENESS_SECONDS, REPLICA_FULL_SYNC_SECONDS
+from sqlite_store import ThreadLocalSQLite
+
+# Local read replica of the Hope_Trust table. supabase_client keeps it in sync
+# (a full load, then new rows by receipt number) and applies this app's own
+# writes to it, and reads from it while it is fresh instead of going to
+# Supabase. Rows are stored exactly as PostgREST returned them.
+REPLICA_PATH = os.path.join(BASE_PDF_OUTPUT_DIR, "hope_trust_replica.sqlite3")
+
+# hope_trust_load is filled page by page during a full load and swapped in at the end.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hope_trust (
+    receipt_no TEXT PRIMARY KEY,
+    report INTEGER NOT NULL DEFAULT 0,
+    date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hope_trust_missing ON hope_trust (report, receipt_no);
+CREATE INDEX IF NOT EXISTS hope_trust_date ON hope_trust (date, receipt_no);
+CREATE TABLE IF NOT EXISTS hope_trust_load (
+    receipt_no TEXT PRIMARY KEY,
+    report INTEGER NOT NULL DEFAULT 0,
+    date TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+_TABLES = ("hope_trust", "hope_trust_load")
+
+# Mirrors sync_state so freshness checks on the read path never touch disk.
+_state: Optional[Dict[str, Any]] = None
+_state_lock = threading.Lock()
+
+# Yields this thread's connection to the replica inside a transaction.
+_replica = ThreadLocalSQLite(REPLICA_PATH, _SCHEMA).transaction
+
+def _sync_state() -> Dict[str, Any]:
+    global _state
+    with _state_lock:
+        if _state is None:
+            with _replica() as conn:
+                stored = dict(conn.execute("SELECT key, value FROM sync_state").fetchall())
+            _state = {
+                "high_water": stored.get("high_water"),
+                "synced_at": float(stored.get("synced_at") or 0),
+                "full_synced_at": float(stored.get("full_synced_at") or 0),
+            }
+        return _state
+
+def _save_state(conn: sqlite3.Connection, **values):
+    conn.executemany(
+        "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        [(key, None if value is None else str(value)) for key, value in values.items()]
+    )
+
+def _set_state(**values):
+    state = _sync_state()
+    with _state_lock:
+        state.update(values)
+
+def _row_values(row: Dict[str, Any]):
+    return (str(row["receipt_no"]).strip(), int(bool(row.get("report"))), str(row.get("date") or "")[:10],
+            json.dumps(row, default=str))
+
+def replica_is_fresh() -> bool:
+    """True once fully loaded and synced within REPLICA_MAX_STALENESS_SECONDS."""
+    state = _sync_state()
+    return state["full_synced_at"] > 0 and time.time() - state["synced_at"] <= REPLICA_MAX_STALENESS_SECONDS
+
+def replica_needs_full_sync() -> bool:
+    return time.time() - _sync_state()["full_synced_at"] > REPLICA_FULL_SYNC_SECONDS
+
+def replica_high_water() -> Optional[str]:
+    """The highest receipt number synced so far; newer rows are fetched past it."""
+    return _sync_state()["high_water"]
+
+def load_replica(rows: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+    """
+    Replaces the replica with `rows` (every Hope_Trust row). Rows are staged in
+    short transactions and swapped in at the end, so readers keep the old
+    contents until the load completes and a failed load changes nothing.
+    Returns the number of rows loaded.
+    """
+    with _replica() as conn:
+        conn.execute("DELETE FROM hope_trust_load")
+    count, high_water, batch = 0, None, []
+    for row in rows:
+        batch.append(_row_values(row))
+        if len(batch) >= batch_size:
+            with _replica() as conn:
+                conn.executemany("INSERT OR REPLACE INTO hope_trust_load VALUES (?, ?, ?, ?)", batch)
+            count += len(batch)
+            batch = []
+        high_water = max(high_water or "", str(row["receipt_no"]).strip())
+    now = time.time()
+    with _replica() as conn:
+        conn.executemany("INSERT OR REPLACE INTO hope_trust_load VALUES (?, ?, ?, ?)", batch)
+        count += len(batch)
+        conn.execute("DELETE FROM hope_trust")
+        conn.execute("INSERT INTO hope_trust SELECT * FROM hope_trust_load")
+        conn.execute("DELETE FROM hope_trust_load")
+        _save_state(conn, high_water=high_water, synced_at=now, full_synced_at=now)
+    _set_state(high_water=high_water, synced_at=now, full_synced_at=now)
+    return count
+
+def upsert_replica_rows(rows: Iterable[Dict[str, Any]], missing_receipt_nos: Optional[List[str]] = None) -> int:
+    """
+    Adds or replaces rows fetched since the last sync and marks the replica
+    synced. With `missing_receipt_nos` (every receipt whose remote 'report' flag
+    is false), the local report flags are reconciled to match.
+    Returns the number of rows written.
+    """
+    values = [_row_values(row) for row in rows]
+    high_water = max([replica_high_water() or ""] + [value[0] for value in values]) or None
+    now = time.time()
+    with _replica() as conn:
+        conn.executemany("INSERT OR REPLACE INTO hope_trust VALUES (?, ?, ?, ?)", values)
+        if missing_receipt_nos is not None:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS missing (receipt_no TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.missing")
+            conn.executemany("INSERT OR IGNORE INTO missing VALUES (?)", ((r.strip(),) for r in missing_receipt_nos))
+            conn.execute(
+                "UPDATE hope_trust SET report = 1, data = json_set(data, '$.report', json('true')) "
+                "WHERE report = 0 AND receipt_no NOT IN (SELECT receipt_no FROM missing)"
+            )
+            conn.execute(
+                "UPDATE hope_trust SET report = 0, data = json_set(data, '$.report', json('false')) "
+                "WHERE report = 1 AND receipt_no IN (SELECT receipt_no FROM missing)"
+            )
+        _save_state(conn, high_water=high_water, synced_at=now)
+    _set_state(high_water=high_water, synced_at=now)
+    return len(values)
+
+def store_replica_row(row: Dict[str, Any]):
+    """Caches one row read from Supabase (e.g. a lookup of a receipt newer than the last sync)."""
+    with _replica() as conn:
+        conn.execute("INSERT OR REPLACE INTO hope_trust VALUES (?, ?, ?, ?)", _row_values(row))
+
+def apply_replica_update(receipt_no: str, changes: Dict[str, Any]):
+    """Applies a write this app made to Supabase. Unknown receipts are ignored."""
+    receipt_no = receipt_no.strip()
+    with _replica() as conn:
+        for table in _TABLES:
+            found = conn.execute(f"SELECT data FROM {table} WHERE receipt_no = ?", (receipt_no,)).fetchone()
+            if found:
+                row = {**json.loads(found[0]), **changes}
+                conn.execute(f"UPDATE {table} SET report = ?, date = ?, data = ? WHERE receipt_no = ?",
+                             _row_values(row)[1:] + (receipt_no,))
+
+def mark_replica_reported(receipt_nos: Iterable[str]):
+    """Sets the 'report' flag on receipts this app flagged in Supabase."""
+    keys = [(receipt_no.strip(),) for receipt_no in receipt_nos]
+    with _replica() as conn:
+        for table in _TABLES:
+            conn.executemany(
+                f"UPDATE {table} SET report = 1, data = json_set(data, '$.report', json('true')) "
+                "WHERE receipt_no = ?", keys
+            )
+
+def replica_lacks(receipt_nos: Iterable[str], chunk_size: int = 500) -> List[str]:
+    """Returns the receipt numbers (stripped) that the replica has no row for."""
+    receipt_nos = [receipt_no.strip() for receipt_no in receipt_nos]
+    present = set()
+    with _replica() as conn:
+        for start in range(0, len(receipt_nos), chunk_size):
+            chunk = receipt_nos[start:start + chunk_size]
+            present.update(row[0] for row in conn.execute(
+                f"SELECT receipt_no FROM hope_trust WHERE receipt_no IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+    return [receipt_no for receipt_no in receipt_nos if receipt_no not in present]
+
+def get_replica_record(receipt_no: str) -> Optional[Dict[str, Any]]:
+    with _replica() as conn:
+        found = conn.execute("SELECT data FROM hope_trust WHERE receipt_no = ?", (receipt_no.strip(),)).fetchone()
+    return json.loads(found[0]) if found else None
+
+def count_replica_missing() -> int:
+    with _replica() as conn:
+        return conn.execute("SELECT COUNT(*) FROM hope_trust WHERE report = 0").fetchone()[0]
+
+def iter_replica_rows(columns: str = "*", missing_only: bool = False, since_date: Optional[str] = None,
+                      page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Yields rows ordered by receipt number, like the remote keyset readers,
+    optionally only those with 'report' false or dated on or after `since_date`.
+    `columns` is a PostgREST-style select list.
+    """
+    where, params = ["receipt_no > ?"], [""]
+    if missing_only:
+        where.append("report = 0")
+    if since_date:
+        where.append("date >= ?")
+        params.append(since_date)
+    keep = None if columns.strip() == "*" else [column.strip() for column in columns.split(",")]
+    while True:
+        with _replica() as conn:
+            page = conn.execute(
+                f"SELECT receipt_no, data FROM hope_trust WHERE {' AND '.join(where)} ORDER BY receipt_no LIMIT ?",
+                params + [page_size]
+            ).fetchall()
+        for _, data in page:
+            row = json.loads(data)
+            yield row if keep is None else {column: row.get(column) for column in keep}
+        if len(page) < page_size:
+            return
+        params[0] = page[-1][0]
+
+def replica_status() -> Dict[str, Any]:
+    """Row count, seconds since the last sync and whether reads are served locally."""
+    state = _sync_state()
+    with _replica() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM hope_trust").fetchone()[0]
+    return {
+        "rows": rows,
+        "high_water": state["high_water"],
+        "sync_age_seconds": time.time() - state["synced_at"] if state["synced_at"] else None,
+        "fresh": replica_is_fresh(),
+    }
@@ -0,0 +1,43 @@
+# app/sqlite_store.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+class ThreadLocalSQLite:
+    """
+    A local SQLite database shared by every session. Each thread gets its own
+    connection, opened in WAL mode and migrated with `schema` on first use.
+
+    Args:
+        path (str): The database file.
+        schema (str): Idempotent SQL script run on every new connection.
+        on_create (callable, optional): Called with the first connection when
+            the file did not exist yet, e.g. to import pre-existing data.
+    """
+    def __init__(self, path: str, schema: str,
+                 on_create: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.path = path
+        self.schema = schema
+        self.on_create = on_create
+        self._connections = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        is_new = not os.path.exists(self.path)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.schema)
+        if is_new and self.on_create is not None:
+            self.on_create(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yields this thread's connection inside a transaction (committed on success)."""
+        conn = getattr(self._connections, "conn", None)
+        if conn is None:
+            conn = self._connections.conn = self._connect()
+        with conn:
+            yield conn
@@ -0,0 +1,175 @@
+# app/supabase_async.py
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from supabase import acreate_client, AsyncClient
+from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_ASYNC_CONCURRENCY
+from render_cache import mark_receipt_dirty
+from record_cache import get_cached_record, store_record, invalidate_record
+from perf_metrics import timed
+from duplicate_index import forget_receipt
+from donor_search import update_indexed_donation
+from replica import replica_is_fresh, get_replica_record, store_replica_row, apply_replica_update, mark_replica_reported
+from supabase_client import _donor_rpc_args, _remember_result
+
+# Async mirrors of the per-row calls in supabase_client, for batch callers that
+# want many requests in flight at once instead of one round trip after another.
+# Return values match the synchronous functions exactly. supabase_client uses
+# them when a bulk RPC is not deployed, so the per-row fallback is concurrent.
+
+T = TypeVar("T")
+
+# One AsyncClient per event loop: its HTTP connections are bound to the loop
+# that created them, and each run_concurrently() call runs its own loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = weakref.WeakKeyDictionary()
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Returns the AsyncClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+        _clients[loop] = client
+    return client
+
+async def close_async_supabase_client():
+    """Closes the running loop's AsyncClient and its HTTP connections, if one was created."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is None:
+        return
+    if client._postgrest is not None:
+        await client._postgrest.aclose()
+    http_client = getattr(client.auth, "_http_client", None)
+    if http_client is not None:
+        await http_client.aclose()
+
+async def _execute_async(name: str, query):
+    """Awaits a supabase-py query or RPC, recording its latency under `name`."""
+    with timed(name):
+        return await query.execute()
+
+async def process_donor_and_get_receipt_no_async(date, name, amount, pan, address, user_email, entry_mode, serial_no=None):
+    client = await get_async_supabase_client()
+    try:
+        rpc_args = _donor_rpc_args(date, name, amount, pan, address, user_email, entry_mode, serial_no)
+        response = await _execute_async("rpc.process_and_generate_receipt", client.rpc("process_and_generate_receipt", rpc_args))
+        _remember_result(date, name, amount, pan, response.data, address)
+        return True, response.data
+    except Exception as e:
+        return False, f"Supabase RPC error: {e}"
+
+async def set_receipt_generated_flag_async(receipt_no: str) -> bool:
+    """Async version of set_receipt_generated_flag. Returns True on success, False on failure."""
+    client = await get_async_supabase_client()
+    try:
+        trimmed_receipt_no = receipt_no.strip()
+        response = await _execute_async("rpc.mark_report_true", client.rpc("mark_report_true", {
+            "p_receipt_no": trimmed_receipt_no
+        }))
+        actual_response = response.data[0] if isinstance(response.data, list) and response.data else response.data
+        if actual_response == 'success':
+            invalidate_record(trimmed_receipt_no)
+            mark_replica_reported([trimmed_receipt_no])
+            return True
+        print(f"❌ Report flag update failed via RPC for {trimmed_receipt_no}. Actual response: {actual_response}")
+        return False
+    except Exception as e:
+        print(f"❌ Report flag update failed for {receipt_no} (RPC error): {e}")
+        return False
+
+async def get_receipt_by_number_async(receipt_no: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """Async version of get_receipt_by_number. Returns (success_boolean, record_dictionary_or_none)."""
+    cached = get_cached_record(receipt_no)
+    if cached is not None:
+        return True, cached
+    local = get_replica_record(receipt_no) if replica_is_fresh() else None
+    if local is not None:
+        store_record(receipt_no, local)
+        return True, local
+    client = await get_async_supabase_client()
+    try:
+        response = await _execute_async("rest.select.Hope_Trust", client.table("Hope_Trust").select("*").eq("receipt_no", receipt_no))
+        if response.data:
+            store_record(receipt_no, response.data[0])
+            store_replica_row(response.data[0])
+            return True, response.data[0]
+        return True, None
+    except Exception as e:
+        print(f"Error fetching receipt {receipt_no}: {e}")
+        return False, None
+
+async def update_receipt_details_async(receipt_no: str, updated_data: Dict[str, Any]) -> Tuple[bool, str]:
+    """Async version of update_receipt_details. Returns (success_boolean, message_string)."""
+    client = await get_async_supabase_client()
+    try:
+        response = await _execute_async("rest.update.Hope_Trust", client.table("Hope_Trust").update(updated_data).eq("receipt_no", receipt_no))
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
+        if len(response.data) > 0:
+            mark_receipt_dirty(receipt_no)
+            update_indexed_donation(receipt_no, updated_data)
+            apply_replica_update(receipt_no, updated_data)
+            return True, "Record updated successfully."
+        return False, "Failed to update record or record not found."
+    except Exception as e:
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
+        return False, f"Supabase update error: {e}"
+
+async def gather_bounded(calls: Sequence[Callable[[], Awaitable[T]]],
+                         limit: int = SUPABASE_ASYNC_CONCURRENCY) -> List[T]:
+    """
+    Runs the coroutine factories with at most `limit` in flight and returns
+    their results in submission order.
+    """
+    # Create the loop's client up front so the first wave doesn't race to build it.
+    await get_async_supabase_client()
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(bounded(call) for call in calls))
+
+def run_concurrently(calls: Sequence[Callable[[], Awaitable[T]]],
+                     limit: int = SUPABASE_ASYNC_CONCURRENCY) -> List[T]:
+    """
+    Synchronous entry point for Streamlit pages: runs gather_bounded() on a
+    fresh event loop and returns the results in submission order. The loop's
+    client is closed before returning.
+
+    Usage:
+        results = run_concurrently([lambda r=r: get_receipt_by_number_async(r) for r in receipt_nos])
+    """
+    if not calls:
+        return []
+
+    async def run():
+        try:
+            return await gather_bounded(calls, limit)
+        finally:
+            await close_async_supabase_client()
+
+    return asyncio.run(run())
+
+def process_donors_concurrently(rows: List[Dict[str, Any]], user_email: str, entry_mode: str,
+                                limit: int = SUPABASE_ASYNC_CONCURRENCY) -> List[Tuple[bool, str]]:
+    """
+    Runs process_and_generate_receipt for every row concurrently.
+    Rows and results are as for supabase_client.process_donors_bulk.
+    """
+    return run_concurrently([
+        lambda row=row: process_donor_and_get_receipt_no_async(user_email=user_email, entry_mode=entry_mode, **row)
+        for row in rows
+    ], limit)
+
+def set_receipt_generated_flags_concurrently(receipt_nos: List[str],
+                                             limit: int = SUPABASE_ASYNC_CONCURRENCY) -> Dict[str, bool]:
+    """Flags every receipt concurrently. Returns success per receipt number."""
+    results = run_concurrently([
+        lambda receipt_no=receipt_no: set_receipt_generated_flag_async(receipt_no)
+        for receipt_no in receipt_nos
+    ], limit)
+    return dict(zip(receipt_nos, results))
@@ -1,8 +1,100 @@
 # app/supabase_client.py
-from typing import Tuple, List, Dict, Any
-from config import get_supabase_client, SUPABASE_URL, SUPABASE_KEY
+import threading
+import time
+from datetime import date as _date, timedelta
+from itertools import islice
+from typing import Tuple, List, Dict, Any, Iterator, Optional
+from config import (get_supabase_client, SUPABASE_URL, SUPABASE_KEY, DONOR_RPC_CHUNK_SIZE, FLAG_RPC_CHUNK_SIZE,
+                    REST_CONNECT_TIMEOUT, REST_READ_TIMEOUT, REST_MAX_RETRIES, REST_BACKOFF_FACTOR,
+                    MISSING_RECEIPTS_PAGE_SIZE, DUPLICATE_INDEX_SEED_DAYS, DONOR_SEARCH_PAGE_SIZE,
+                    REPLICA_SYNC_SECONDS, REPLICA_PAGE_SIZE)
+from render_cache import mark_receipt_dirty
+from record_cache import get_cached_record, store_record, invalidate_record
+from perf_metrics import timed
+from duplicate_index import remember_donation, forget_receipt, needs_seeding, seed_duplicate_index
+from donor_search import index_donation, update_indexed_donation, donor_search_needs_reload, rebuild_donor_search
+from replica import (replica_is_fresh, replica_needs_full_sync, replica_high_water, load_replica, upsert_replica_rows,
+                     store_replica_row, apply_replica_update, mark_replica_reported, get_replica_record,
+                     count_replica_missing, iter_replica_rows, replica_lacks)
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+# Only the columns the recovery page needs to rebuild a receipt.
+MISSING_RECEIPT_COLUMNS = "receipt_no,name,address,pan,amount,date"
+# The columns process_and_generate_receipt compares to detect duplicates.
+DONATION_KEY_COLUMNS = "receipt_no,name,pan,amount,date"
+# The columns the donor search index matches on.
+DONOR_SEARCH_COLUMNS = "receipt_no,name,address,pan,amount,date"
+# Receipt numbers per in.(...) filter, so request URLs stay well under proxy limits.
+IN_FILTER_CHUNK_SIZE = 200
+
+# PostgREST answers PGRST202 (or a bare 404) when an RPC is not deployed.
+_MISSING_FUNCTION_CODES = ("PGRST202", "404")
+# Bulk RPCs found missing in this process; later calls go straight to per-row RPCs.
+_missing_functions = set()
+
+_rest_session = None
+_rest_session_lock = threading.Lock()
+
+def get_rest_session() -> requests.Session:
+    """
+    Returns the process-wide session used for direct PostgREST calls.
+    Connections are kept alive and pooled, responses are gzip-encoded, and
+    connection errors and 5xx responses are retried with exponential backoff.
+    """
+    global _rest_session
+    with _rest_session_lock:
+        if _rest_session is None:
+            retry = Retry(
+                total=REST_MAX_RETRIES,
+                backoff_factor=REST_BACKOFF_FACTOR,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip"
+            })
+            _rest_session = session
+        return _rest_session
+
+def rest_get(path: str, params: Optional[Dict[str, str]] = None,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """
+    GETs a PostgREST path (e.g. "Hope_Trust") through the shared session with
+    the configured connect/read timeouts. Raises for HTTP errors.
+    """
+    with timed(f"rest.get.{path}"):
+        response = get_rest_session().get(
+            f"{SUPABASE_URL}/rest/v1/{path}",
+            params=params,
+            headers=headers,
+            timeout=(REST_CONNECT_TIMEOUT, REST_READ_TIMEOUT)
+        )
+        response.raise_for_status()
+    return response
+
+def _execute(name: str, query):
+    """Executes a supabase-py query or RPC, recording its latency under `name`."""
+    with timed(name):
+        return query.execute()
+
+def _is_missing_function(error: Exception) -> bool:
+    """True if an RPC failed because the function does not exist in the database."""
+    return str(getattr(error, "code", "")) in _MISSING_FUNCTION_CODES
+
+def _remember_missing_function(name: str):
+    if name not in _missing_functions:
+        _missing_functions.add(name)
+        print(f"⚠️ RPC {name} is not deployed (see sql/bulk_rpcs.sql). Using per-row calls instead.")
 
 def direct_api_test() -> list:
     """
@@ -10,23 +102,15 @@ def direct_api_test() -> list:
     Returns all rows from the Hope_Trust table.
     """
     try:
-        url = f"{SUPABASE_URL}/rest/v1/Hope_Trust?select=*"
-        headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = rest_get("Hope_Trust", params={"select": "*"})
         data = response.json()
         return data
     except Exception as e:
         print(f"Error during direct API test: {e}")
-        if 'response' in locals():
-            print("Raw response text:", response.text)
+        if getattr(e, 'response', None) is not None:
+            print("Raw response text:", e.response.text)
         return []
 
-from typing import Optional
-
 def supabase_client():
     # Get a client instance
     return get_supabase_client()
@@ -36,36 +120,132 @@ def process_donor_and_get_receipt_no(date, name, amount, pan, address, user_emai
     client = supabase_client()
     try:
         # Check for existing record
-        rpc_args = {
-            "p_name": name.upper(),
-            "p_address": address.upper(),
-            "p_pan": pan.upper(),
-            "p_amount": float(amount),
-            "p_date": date,
-            "p_serial_no": serial_no,
-            "p_user_email": user_email,
-            "p_entry_mode": entry_mode
-        }
-        response = client.rpc("process_and_generate_receipt", rpc_args).execute()
+        rpc_args = _donor_rpc_args(date, name, amount, pan, address, user_email, entry_mode, serial_no)
+        response = _execute("rpc.process_and_generate_receipt", client.rpc("process_and_generate_receipt", rpc_args))
+        _remember_result(date, name, amount, pan, response.data, address)
         return True, response.data
     except Exception as e:
         return False, f"Supabase RPC error: {e}"
 
+def _donor_rpc_args(date, name, amount, pan, address, user_email, entry_mode, serial_no=None) -> Dict[str, Any]:
+    return {
+        "p_name": name.upper(),
+        "p_address": address.upper(),
+        "p_pan": pan.upper(),
+        "p_amount": float(amount),
+        "p_date": date,
+        "p_serial_no": serial_no,
+        "p_user_email": user_email,
+        "p_entry_mode": entry_mode
+    }
+
+def _remember_result(date, name, amount, pan, result, address=None):
+    """
+    Adds a confirmed insert or 'exists:<no>' result to the local duplicate index,
+    and a new insert to the donor search index.
+    """
+    result = str(result or "")
+    exists = result.startswith("exists:")
+    receipt_no = result.split(":", 1)[1] if exists else result
+    if receipt_no and "ONL" in receipt_no:
+        remember_donation(date, name, amount, pan, receipt_no)
+        if not exists:
+            index_donation({"receipt_no": receipt_no, "name": name, "address": address,
+                            "pan": pan, "amount": amount, "date": date})
+
+def _parse_bulk_result(result: Any) -> Tuple[bool, str]:
+    result = str(result) if result is not None else ""
+    if result.startswith("error:"):
+        return False, f"Supabase RPC error: {result.split(':', 1)[1].strip()}"
+    if not result:
+        return False, "Supabase RPC error: empty result for row."
+    return True, result
+
+def _process_donors_one_by_one(rows: List[Dict[str, Any]], user_email: str, entry_mode: str) -> List[Tuple[bool, str]]:
+    """Per-row fallback for process_donors_bulk, with several RPCs in flight at once."""
+    # Imported here: supabase_async builds on this module.
+    from supabase_async import process_donors_concurrently
+    return process_donors_concurrently(rows, user_email=user_email, entry_mode=entry_mode)
+
+def process_donors_bulk(rows: List[Dict[str, Any]], user_email: str, entry_mode: str,
+                        chunk_size: int = DONOR_RPC_CHUNK_SIZE) -> List[Tuple[bool, str]]:
+    """
+    Inserts many donors with one `process_and_generate_receipts_bulk` RPC per chunk.
+
+    Each row is a dict with the keyword arguments of process_donor_and_get_receipt_no
+    (date, name, amount, pan, address and optionally serial_no). The RPC takes
+    `p_rows` (a JSON array of the same objects process_and_generate_receipt
+    receives) and returns one text result per row, in order: the new receipt
+    number, 'exists:<receipt_no>', or 'error:<message>'.
+
+    If the bulk RPC is not deployed (sql/bulk_rpcs.sql), this and every later
+    call in the process use one process_and_generate_receipt call per row. Any
+    other failure is reported as an error for every row of the chunk and the
+    chunk is not re-sent, since the bulk call may already have inserted it.
+
+    Returns:
+        List[Tuple[bool, str]]: One (success, result_string) per row, in input order,
+        with the same meaning as process_donor_and_get_receipt_no's return value.
+    """
+    client = supabase_client()
+    results: List[Tuple[bool, str]] = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if "process_and_generate_receipts_bulk" in _missing_functions:
+            results.extend(_process_donors_one_by_one(chunk, user_email, entry_mode))
+            continue
+        payload = [_donor_rpc_args(user_email=user_email, entry_mode=entry_mode, **row) for row in chunk]
+        try:
+            response = _execute("rpc.process_and_generate_receipts_bulk", client.rpc("process_and_generate_receipts_bulk", {
+                "p_rows": payload,
+                "p_user_email": user_email,
+                "p_entry_mode": entry_mode
+            }))
+        except Exception as e:
+            if _is_missing_function(e):
+                _remember_missing_function("process_and_generate_receipts_bulk")
+                results.extend(_process_donors_one_by_one(chunk, user_email, entry_mode))
+            else:
+                print(f"❌ Bulk donor RPC failed for {len(chunk)} row(s): {e}")
+                results.extend((False, f"Supabase RPC error: {e}") for _ in chunk)
+            continue
+        data = response.data if isinstance(response.data, list) else []
+        if len(data) != len(chunk):
+            print(f"❌ Bulk donor RPC returned {len(data)} result(s) for {len(chunk)} row(s).")
+            results.extend(
+                (False, f"Supabase RPC error: expected {len(chunk)} results, got {len(data)}.") for _ in chunk
+            )
+            continue
+        for row, item in zip(chunk, data):
+            success, result = _parse_bulk_result(item)
+            if success:
+                _remember_result(row["date"], row["name"], row["amount"], row["pan"], result, row.get("address"))
+            results.append((success, result))
+    return results
+
 # Function to update an existing donation record
 def update_donation_record(receipt_no, date, name, amount, pan, address):
     client = supabase_client()
     try:
         # Call the stored procedure to update the record
-        result = client.rpc('update_donation_record', {
+        result = _execute("rpc.update_donation_record", client.rpc('update_donation_record', {
             'p_receipt_no': receipt_no,
             'p_date': date,
             'p_name': name,
             'p_amount': amount,
             'p_address': address,
             'p_pan': pan
-        }).execute()
+        }))
+        mark_receipt_dirty(receipt_no)
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
+        changes = {"date": date, "name": name, "amount": amount, "pan": pan, "address": address}
+        update_indexed_donation(receipt_no, changes)
+        apply_replica_update(receipt_no, changes)
         return True, result
     except Exception as e:
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
         return False, str(e)
 
 # Function to set the receipt generated flag
@@ -80,11 +260,13 @@ def set_receipt_generated_flag(receipt_no: str) -> bool:
         return False
     try:
         trimmed_receipt_no = receipt_no.strip()
-        response = supabase.rpc("mark_report_true", {
+        response = _execute("rpc.mark_report_true", supabase.rpc("mark_report_true", {
             "p_receipt_no": trimmed_receipt_no
-        }).execute()
+        }))
         actual_response = response.data[0] if isinstance(response.data, list) and response.data else response.data
         if actual_response == 'success':
+            invalidate_record(trimmed_receipt_no)
+            mark_replica_reported([trimmed_receipt_no])
             print(f"✅ Report flag updated for {trimmed_receipt_no} via RPC.")
             return True
         else:
@@ -94,40 +276,291 @@ def set_receipt_generated_flag(receipt_no: str) -> bool:
         print(f"❌ Report flag update failed for {receipt_no} (RPC error): {e}")
         return False
 
-def fetch_missing_receipts() -> Tuple[bool, List[Dict[str, Any]]]:
+def _set_flags_one_by_one(receipt_nos: List[str]) -> Dict[str, bool]:
+    """Per-receipt fallback for set_receipt_generated_flags, with several RPCs in flight at once."""
+    from supabase_async import set_receipt_generated_flags_concurrently
+    return set_receipt_generated_flags_concurrently(receipt_nos)
+
+def set_receipt_generated_flags(receipt_nos: List[str], chunk_size: int = FLAG_RPC_CHUNK_SIZE) -> Dict[str, bool]:
     """
-    Fetches all records from Hope_Trust where 'report' is false.
-    Uses a direct HTTP request to bypass a suspected library bug.
+    Sets the 'report' flag to TRUE for many receipts with one
+    `mark_report_true_bulk` RPC per chunk. The RPC takes `p_receipt_nos` (text[])
+    and returns every one of them that exists, so receipts already reported
+    count as a success.
+
+    If the bulk RPC is not deployed (sql/bulk_rpcs.sql), this and every later
+    call in the process use one mark_report_true call per receipt. Any other
+    failure marks the chunk as failed; setting the flag is idempotent, so
+    callers such as the outbox can simply retry.
+
+    Returns:
+        Dict[str, bool]: Success per receipt number, keyed by the numbers as passed in.
+    """
+    results: Dict[str, bool] = {}
+    supabase = get_supabase_client()
+    if not supabase:
+        print("❌ Database client not initialized (in set_receipt_generated_flags).")
+        return {receipt_no: False for receipt_no in receipt_nos}
+    for start in range(0, len(receipt_nos), chunk_size):
+        chunk = receipt_nos[start:start + chunk_size]
+        if "mark_report_true_bulk" in _missing_functions:
+            results.update(_set_flags_one_by_one(chunk))
+            continue
+        try:
+            response = _execute("rpc.mark_report_true_bulk", supabase.rpc("mark_report_true_bulk", {
+                "p_receipt_nos": [receipt_no.strip() for receipt_no in chunk]
+            }))
+        except Exception as e:
+            if _is_missing_function(e):
+                _remember_missing_function("mark_report_true_bulk")
+                results.update(_set_flags_one_by_one(chunk))
+            else:
+                print(f"❌ Bulk report flag RPC failed for {len(chunk)} receipt(s): {e}")
+                results.update((receipt_no, False) for receipt_no in chunk)
+            continue
+        reported = {str(receipt_no).strip() for receipt_no in (response.data or [])}
+        for receipt_no in chunk:
+            results[receipt_no] = receipt_no.strip() in reported
+            invalidate_record(receipt_no.strip())
+        mark_replica_reported(reported)
+        print(f"✅ Report flag set for {sum(results[r] for r in chunk)}/{len(chunk)} receipts via bulk RPC.")
+    return results
+
+def _in_filter(values: List[str]) -> str:
+    """A PostgREST in.(...) filter; values are quoted so commas or dots in them are safe."""
+    quoted = ",".join('"{}"'.format(str(value).replace('\\', '\\\\').replace('"', '\\"')) for value in values)
+    return f"in.({quoted})"
+
+def fetch_reported_receipt_nos(receipt_nos: List[str], chunk_size: int = IN_FILTER_CHUNK_SIZE) -> set:
+    """
+    Returns which of `receipt_nos` (stripped) already have 'report' set in Supabase.
+    Raises on request errors.
+    """
+    return {
+        str(row["receipt_no"]).strip()
+        for row in _fetch_receipts(receipt_nos, "receipt_no", {"report": "is.true"}, chunk_size)
+    }
+
+def _fetch_receipts(receipt_nos: List[str], columns: str = "*", filters: Optional[Dict[str, str]] = None,
+                    chunk_size: int = IN_FILTER_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yields the Hope_Trust rows for the given receipt numbers, fetched by in.(...) filter in chunks."""
+    receipt_nos = [receipt_no.strip() for receipt_no in receipt_nos]
+    for start in range(0, len(receipt_nos), chunk_size):
+        chunk = receipt_nos[start:start + chunk_size]
+        yield from rest_get("Hope_Trust", params={
+            "select": columns, "receipt_no": _in_filter(chunk), **(filters or {})
+        }).json()
+
+def count_missing_receipts() -> Tuple[bool, int]:
+    """
+    Counts records where 'report' is false without downloading them, using
+    PostgREST's exact count in the Content-Range header. Served from the local
+    replica while it is fresh.
+    Returns a tuple: (success_boolean, count).
+    """
+    if replica_is_fresh():
+        return True, count_replica_missing()
+    try:
+        response = rest_get(
+            "Hope_Trust",
+            params={"select": "receipt_no", "report": "is.false", "limit": "1"},
+            headers={"Prefer": "count=exact"}
+        )
+        # Content-Range looks like "0-0/1234", or "*/0" when nothing matches.
+        total = response.headers.get("Content-Range", "*/0").rsplit("/", 1)[1]
+        return True, int(total)
+    except Exception as e:
+        print(f"❌ Failed to count missing receipts (via direct API): {e}")
+        return False, 0
+
+def _iter_hope_trust(filters: Dict[str, str], columns: str, page_size: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yields Hope_Trust rows matching PostgREST `filters`, one page at a time.
+    Pages are keyed on receipt_no rather than offsets, so rows updated while
+    the caller is iterating do not shift later pages.
+    """
+    last_receipt_no = None
+    while True:
+        params = {"select": columns, **filters, "order": "receipt_no.asc", "limit": str(page_size)}
+        if last_receipt_no is not None:
+            params["receipt_no"] = f"gt.{last_receipt_no}"
+        page = rest_get("Hope_Trust", params=params).json()
+        yield from page
+        if len(page) < page_size:
+            return
+        last_receipt_no = page[-1]["receipt_no"]
+
+def iter_missing_receipts(page_size: int = MISSING_RECEIPTS_PAGE_SIZE,
+                          columns: str = MISSING_RECEIPT_COLUMNS) -> Iterator[Dict[str, Any]]:
+    """
+    Yields records where 'report' is false, one page at a time, selecting only
+    `columns`. Receipts flagged while the caller is iterating do not shift
+    later pages. Stop iterating to stop fetching. Served from the local replica
+    while it is fresh. Raises on HTTP errors.
+    """
+    if replica_is_fresh():
+        return iter_replica_rows(columns, missing_only=True, page_size=page_size)
+    return _iter_hope_trust({"report": "is.false"}, columns, page_size)
+
+def iter_donations_since(since_date: str, page_size: int = MISSING_RECEIPTS_PAGE_SIZE,
+                         columns: str = DONATION_KEY_COLUMNS) -> Iterator[Dict[str, Any]]:
+    """
+    Yields records dated on or after `since_date` (YYYY-MM-DD), one page at a
+    time, selecting only the duplicate-check columns by default. Served from the
+    local replica while it is fresh. Raises on HTTP errors.
+    """
+    if replica_is_fresh():
+        return iter_replica_rows(columns, since_date=since_date, page_size=page_size)
+    return _iter_hope_trust({"date": f"gte.{since_date}"}, columns, page_size)
+
+_duplicate_index_thread: Optional[threading.Thread] = None
+_duplicate_index_lock = threading.Lock()
+
+def _load_duplicate_index(since_date: str):
+    try:
+        count = seed_duplicate_index(iter_donations_since(since_date), since_date)
+        print(f"✅ Duplicate index loaded with {count} donations since {since_date}.")
+    except Exception as e:
+        print(f"❌ Failed to load the duplicate index: {e}")
+
+def refresh_duplicate_index(force: bool = False) -> bool:
+    """
+    Loads the last DUPLICATE_INDEX_SEED_DAYS of donations into the local
+    duplicate index in a background thread if it is missing or stale (or
+    `force` is set). Uploads keep using the previous index meanwhile; a row it
+    does not know is simply checked by the server.
+    Returns True while a load is running.
+    """
+    global _duplicate_index_thread
+    since_date = (_date.today() - timedelta(days=DUPLICATE_INDEX_SEED_DAYS)).isoformat()
+    with _duplicate_index_lock:
+        if _duplicate_index_thread is not None and _duplicate_index_thread.is_alive():
+            return True
+        if not force and not needs_seeding(since_date):
+            return False
+        _duplicate_index_thread = threading.Thread(target=_load_duplicate_index, args=(since_date,),
+                                                   name="duplicate-index-loader", daemon=True)
+        _duplicate_index_thread.start()
+        return True
+
+_donor_search_thread: Optional[threading.Thread] = None
+_donor_search_lock = threading.Lock()
+
+def _load_donor_search():
+    try:
+        if replica_is_fresh():
+            rows = iter_replica_rows(DONOR_SEARCH_COLUMNS, page_size=DONOR_SEARCH_PAGE_SIZE)
+        else:
+            rows = _iter_hope_trust({}, DONOR_SEARCH_COLUMNS, DONOR_SEARCH_PAGE_SIZE)
+        count = rebuild_donor_search(rows)
+        print(f"✅ Donor search index loaded with {count} donations.")
+    except Exception as e:
+        print(f"❌ Failed to load the donor search index: {e}")
+
+def refresh_donor_search(force: bool = False) -> bool:
+    """
+    Reloads the donor search index from every Hope_Trust row in a background
+    thread if it is stale (or `force` is set). Searches keep using the previous
+    index until the reload finishes.
+    Returns True while a reload is running.
+    """
+    global _donor_search_thread
+    with _donor_search_lock:
+        if _donor_search_thread is not None and _donor_search_thread.is_alive():
+            return True
+        if not force and not donor_search_needs_reload():
+            return False
+        _donor_search_thread = threading.Thread(target=_load_donor_search, name="donor-search-loader", daemon=True)
+        _donor_search_thread.start()
+        return True
+
+_replica_sync_lock = threading.Lock()
+_replica_syncer: Optional[threading.Thread] = None
+_replica_syncer_lock = threading.Lock()
+
+def sync_replica(full: bool = False) -> bool:
+    """
+    Brings the local Hope_Trust replica up to date. The first sync, and one every
+    REPLICA_FULL_SYNC_SECONDS (or with `full`), reloads the whole table. Other
+    syncs fetch rows past the highest receipt number seen and the receipt
+    numbers still awaiting a report, to reconcile report flags. Any of those
+    the replica lacks (e.g. numbers that sort below the high-water mark as
+    text) are fetched too, so recovery never misses an unreported receipt.
+    Returns False if the sync failed; reads then fall back to Supabase once the
+    replica goes stale.
+    """
+    with _replica_sync_lock:
+        try:
+            if full or replica_needs_full_sync():
+                count = load_replica(_iter_hope_trust({}, "*", REPLICA_PAGE_SIZE))
+                print(f"✅ Replica loaded with {count} rows.")
+                return True
+            high_water = replica_high_water()
+            filters = {"receipt_no": f"gt.{high_water}"} if high_water else {}
+            new_rows = list(_iter_hope_trust(filters, "*", REPLICA_PAGE_SIZE))
+            missing = [row["receipt_no"] for row in _iter_hope_trust({"report": "is.false"}, "receipt_no", REPLICA_PAGE_SIZE)]
+            fetched = {str(row["receipt_no"]).strip() for row in new_rows}
+            absent = [receipt_no for receipt_no in replica_lacks(missing) if receipt_no not in fetched]
+            new_rows.extend(_fetch_receipts(absent))
+            count = upsert_replica_rows(new_rows, missing)
+            if count:
+                print(f"🔄 Replica synced {count} new rows.")
+            return True
+        except Exception as e:
+            print(f"❌ Replica sync failed: {e}")
+            return False
+
+def _sync_replica_forever():
+    while True:
+        sync_replica()
+        time.sleep(REPLICA_SYNC_SECONDS)
+
+def start_replica_sync():
+    """Starts the background replica sync thread once per process."""
+    global _replica_syncer
+    with _replica_syncer_lock:
+        if _replica_syncer is None or not _replica_syncer.is_alive():
+            _replica_syncer = threading.Thread(target=_sync_replica_forever, name="replica-sync", daemon=True)
+            _replica_syncer.start()
+
+def fetch_missing_receipts(limit: Optional[int] = None) -> Tuple[bool, List[Dict[str, Any]]]:
+    """
+    Fetches records from Hope_Trust where 'report' is false, at most `limit` of them.
+    Uses direct, paginated HTTP requests to bypass a suspected library bug.
     Returns a tuple: (success_boolean, list_of_records).
     """
     try:
-        url = f"{SUPABASE_URL}/rest/v1/Hope_Trust?select=*&report=is.false"
-        headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = list(islice(iter_missing_receipts(), limit))
         print(f"✅ Found {len(data)} missing receipts (via direct API).")
         return True, data
     except Exception as e:
         print(f"❌ Failed to fetch missing receipts (via direct API): {e}")
-        if 'response' in locals():
-            print("Raw response text:", response.text)
+        if getattr(e, 'response', None) is not None:
+            print("Raw response text:", e.response.text)
         return False, []
 
 def get_receipt_by_number(receipt_no: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
     """
-    Fetches a single record from Hope_Trust by its receipt number.
+    Fetches a single record from Hope_Trust by its receipt number, served from
+    the process-wide record cache or the local replica when possible. Receipts
+    the replica does not have yet are fetched from Supabase.
     Returns a tuple: (success_boolean, record_dictionary_or_none).
     """
+    cached = get_cached_record(receipt_no)
+    if cached is not None:
+        return True, cached
+    local = get_replica_record(receipt_no) if replica_is_fresh() else None
+    if local is not None:
+        store_record(receipt_no, local)
+        return True, local
     supabase = get_supabase_client()
     if not supabase:
         return False, None
     try:
-        response = supabase.table("Hope_Trust").select("*").eq("receipt_no", receipt_no).execute()
+        response = _execute("rest.select.Hope_Trust", supabase.table("Hope_Trust").select("*").eq("receipt_no", receipt_no))
         if response.data:
+            store_record(receipt_no, response.data[0])
+            store_replica_row(response.data[0])
             return True, response.data[0]
         else:
             return True, None
@@ -144,10 +577,18 @@ def update_receipt_details(receipt_no: str, updated_data: Dict[str, Any]) -> Tup
     if not supabase:
         return False, "Database client not initialized."
     try:
-        response = supabase.table("Hope_Trust").update(updated_data).eq("receipt_no", receipt_no).execute()
+        response = _execute("rest.update.Hope_Trust", supabase.table("Hope_Trust").update(updated_data).eq("receipt_no", receipt_no))
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
         if len(response.data) > 0:
+            # Cached PDFs of the old content must not be served again.
+            mark_receipt_dirty(receipt_no)
+            update_indexed_donation(receipt_no, updated_data)
+            apply_replica_update(receipt_no, updated_data)
             return True, "Record updated successfully."
         else:
             return False, "Failed to update record or record not found."
     except Exception as e:
+        invalidate_record(receipt_no)
+        forget_receipt(receipt_no)
         return False, f"Supabase update error: {e}"
\ No newline at end of file
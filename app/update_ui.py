@@ -1,9 +1,22 @@
 # app/update_ui.py
 import streamlit as st
-from app.supabase_client import get_receipt_by_number, update_receipt_details
-from app.validators import validate_name, validate_amount, validate_pan, validate_date
+from supabase_client import get_receipt_by_number, update_receipt_details, refresh_donor_search
+from donor_search import search_donors, donor_search_size
+from config import DONOR_SEARCH_RESULT_LIMIT
+from validators import validate_name, validate_amount, validate_pan, validate_date
 from datetime import datetime
 
+def _open_record(receipt_no):
+    st.session_state['current_record'] = None  # Reset on new search
+    st.session_state['update_errors'] = []
+    st.session_state['update_warnings'] = []
+    success, record = get_receipt_by_number(receipt_no)
+    if success and record:
+        st.session_state['current_record'] = record
+        st.success(f"Found record for receipt number: {record['receipt_no']}")
+    else:
+        st.error("Receipt number not found.")
+
 def update_page():
     st.header("Update Receipt Details")
 
@@ -25,15 +38,26 @@ def update_page():
             find_button = st.form_submit_button("Find Receipt")
 
     if find_button and receipt_number_to_find:
-        st.session_state['current_record'] = None  # Reset on new search
-        st.session_state['update_errors'] = []
-        st.session_state['update_warnings'] = []
-        success, record = get_receipt_by_number(receipt_number_to_find)
-        if success and record:
-            st.session_state['current_record'] = record
-            st.success(f"Found record for receipt number: {record['receipt_no']}")
+        _open_record(receipt_number_to_find)
+
+    # Or search by donor details when the receipt number is not at hand
+    loading = refresh_donor_search()
+    query = st.text_input("Or search by name, PAN, address, amount or date", key="update_donor_query")
+    if loading and donor_search_size() == 0:
+        st.info("Donor search is still loading. Try again in a moment.")
+    elif query:
+        matches = search_donors(query, DONOR_SEARCH_RESULT_LIMIT)
+        if matches:
+            labels = {
+                m['receipt_no']: f"{m['receipt_no']} | {m['name']} | ₹{m['amount']} | {m['date']} | {m['pan'] or 'No PAN'}"
+                for m in matches
+            }
+            selected = st.selectbox("Matching donations", options=list(labels), format_func=labels.get,
+                                    key="update_donor_match")
+            if st.button("Open Selected Receipt"):
+                _open_record(selected)
         else:
-            st.error("Receipt number not found.")
+            st.info("No matching donations found.")
 
     # 2. Display record and allow updates if a record has been found
     if st.session_state['current_record']:
@@ -2,6 +2,16 @@
 import re
 from typing import Tuple, Optional
 from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Error messages shared by the per-value validators and validate_donor_columns.
+_DATE_EMPTY = "Date cannot be empty"
+_DATE_FORMAT = "Invalid date format. Please use dd.mm.yy."
+_NAME_EMPTY = "Name cannot be empty"
+_AMOUNT_NUMBER = "Amount must be a valid number."
+_AMOUNT_POSITIVE = "Amount must be a positive value."
+_PAN_FORMAT = "Invalid PAN format. Must be 5 letters, 4 numbers, 1 letter (e.g., ABCDE1234F)."
 
 def validate_amount(amount: any) -> Tuple[Optional[float], Optional[str]]:
     """
@@ -14,10 +24,10 @@ def validate_amount(amount: any) -> Tuple[Optional[float], Optional[str]]:
     try:
         amount_float = float(amount)
     except (ValueError, TypeError):
-        return None, "Amount must be a valid number."
+        return None, _AMOUNT_NUMBER
 
     if amount_float <= 0:
-        return None, "Amount must be a positive value."
+        return None, _AMOUNT_POSITIVE
 
     return amount_float, None
 
@@ -35,7 +45,7 @@ def validate_pan(pan: str) -> Tuple[bool, Optional[str]]:
         return True, None  # PAN is optional, so empty is valid.
 
     if not re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]$', pan_str.upper()):
-        return False, "Invalid PAN format. Must be 5 letters, 4 numbers, 1 letter (e.g., ABCDE1234F)."
+        return False, _PAN_FORMAT
     
     return True, None
 
@@ -45,7 +55,7 @@ def validate_name(name: str) -> Tuple[bool, Optional[str]]:
     Returns (is_valid, error_message)
     """
     if not name or not name.strip():
-        return False, "Name cannot be empty"
+        return False, _NAME_EMPTY
     
     return True, None
 
@@ -55,11 +65,84 @@ def validate_date(date_str: str) -> Tuple[Optional[datetime], Optional[str]]:
     Returns (datetime_obj, error_message)
     """
     if not date_str or not date_str.strip():
-        return None, "Date cannot be empty"
+        return None, _DATE_EMPTY
     
     try:
         # Use %y for two-digit year
         date_obj = datetime.strptime(date_str.strip(), '%d.%m.%y')
         return date_obj, None
     except ValueError:
-        return None, "Invalid date format. Please use dd.mm.yy."
\ No newline at end of file
+        return None, _DATE_FORMAT
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].astype(str).str.strip()
+
+def validate_donor_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validates the Date, Name, Amount and Pan columns of an uploaded sheet all at
+    once, with the same rules as validate_date, validate_name, validate_amount
+    and validate_pan but using vectorized pandas operations instead of a Python
+    call per cell. An amount that is blank or not finite is rejected as not a
+    valid number.
+
+    Args:
+        df (pd.DataFrame): The sheet, read with dtype=str.
+
+    Returns:
+        pd.DataFrame: Indexed like `df`, with columns
+            date     (datetime64, NaT where invalid)
+            name     (stripped)
+            amount   (float, NaN where invalid)
+            pan      (stripped, upper case)
+            address  (stripped)
+            error    (bool mask, True if any field is invalid)
+            message  (the row's errors joined by ", ", or "" when valid)
+    """
+    date_str = _text_column(df, "Date")
+    name = _text_column(df, "Name")
+    amount_str = _text_column(df, "Amount")
+    pan = _text_column(df, "Pan").str.upper()
+
+    dates = pd.to_datetime(date_str, format="%d.%m.%y", errors="coerce")
+    date_empty = date_str == ""
+    date_bad = dates.isna() & ~date_empty
+
+    name_empty = name == ""
+
+    amounts = pd.to_numeric(amount_str, errors="coerce").astype(float)
+    amount_nan = ~np.isfinite(amounts)
+    amount_not_positive = ~amount_nan & (amounts <= 0)
+    amounts = amounts.where(~(amount_nan | amount_not_positive))
+
+    pan_bad = (pan != "") & ~pan.str.fullmatch(r"[A-Z]{5}[0-9]{4}[A-Z]")
+
+    error = date_empty | date_bad | name_empty | amount_nan | amount_not_positive | pan_bad
+
+    # Messages are only built for failing rows, which are normally few.
+    message = pd.Series("", index=df.index, dtype=object)
+    if error.any():
+        failing = np.flatnonzero(error.to_numpy())
+        checks = [
+            (date_empty, lambda i: f"Date (''): {_DATE_EMPTY}"),
+            (date_bad, lambda i: f"Date ('{date_str.iat[i]}'): {_DATE_FORMAT}"),
+            (name_empty, lambda i: _NAME_EMPTY),
+            (amount_nan, lambda i: f"Amount ('{amount_str.iat[i]}'): {_AMOUNT_NUMBER}"),
+            (amount_not_positive, lambda i: f"Amount ('{amount_str.iat[i]}'): {_AMOUNT_POSITIVE}"),
+            (pan_bad, lambda i: f"PAN ('{pan.iat[i]}'): {_PAN_FORMAT}"),
+        ]
+        masks = [(mask.to_numpy(), describe) for mask, describe in checks]
+        message.iloc[failing] = [
+            ", ".join(describe(i) for mask, describe in masks if mask[i]) for i in failing
+        ]
+
+    return pd.DataFrame({
+        "date": dates,
+        "name": name,
+        "amount": amounts,
+        "pan": pan,
+        "address": _text_column(df, "Address"),
+        "error": error,
+        "message": message,
+    }, index=df.index)
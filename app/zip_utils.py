@@ -1,10 +1,87 @@
 import os
 import zipfile
 import io
+from typing import Iterator, List, Optional, Tuple
 
+from perf_metrics import instrumented, timed
+
+# Members that are already compressed gain nothing from DEFLATE, only CPU time.
+ALREADY_COMPRESSED_EXTENSIONS = {'.pdf', '.zip', '.png', '.jpg', '.jpeg', '.gz', '.xlsx'}
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+def _compression_for(filename):
+    """Picks ZIP_STORED for already-compressed files and ZIP_DEFLATED otherwise."""
+    if os.path.splitext(filename)[1].lower() in ALREADY_COMPRESSED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+def _directory_members(directory_path) -> List[Tuple[str, str]]:
+    """Lists (file_path, arcname) for every file under a directory."""
+    members = []
+    for root, _, files in os.walk(directory_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            members.append((file_path, os.path.relpath(file_path, directory_path)))
+    return members
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back out as chunks."""
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip_chunks(members: List[Tuple[str, str]], chunk_size: int = ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Streams a ZIP archive of (file_path, arcname) members as byte chunks.
+    Only one member is buffered at a time, so memory stays bounded no matter
+    how large the archive gets.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as zip_file:
+        for file_path, arcname in members:
+            zip_file.write(file_path, arcname=arcname, compress_type=_compression_for(arcname))
+            data = sink.drain()
+            for start in range(0, len(data), chunk_size):
+                yield data[start:start + chunk_size]
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+@instrumented("zip.build")
+def write_zip_from_directory(directory_path, zip_path) -> Optional[str]:
+    """
+    Streams a ZIP of all the files in a directory straight to a file on disk.
+
+    Args:
+        directory_path (str): The path to the directory to be zipped.
+        zip_path (str): Where to write the archive. Must be outside directory_path.
+
+    Returns:
+        str: zip_path on success, or None if the directory is empty or doesn't exist.
+    """
+    if not os.path.isdir(directory_path) or not os.listdir(directory_path):
+        return None
+
+    with open(zip_path, 'wb') as f:
+        for chunk in iter_zip_chunks(_directory_members(directory_path)):
+            f.write(chunk)
+    return zip_path
+
+@instrumented("zip.build")
 def create_zip_from_directory(directory_path):
     """
-    Creates a compressed ZIP file in memory from all the files in a given directory.
+    Creates a ZIP file in memory from all the files in a given directory.
 
     Args:
         directory_path (str): The path to the directory to be zipped.
@@ -15,13 +92,40 @@ def create_zip_from_directory(directory_path):
     if not os.path.isdir(directory_path) or not os.listdir(directory_path):
         return None
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, directory_path)
-                zip_file.write(file_path, arcname=arcname)
+    return b"".join(iter_zip_chunks(_directory_members(directory_path)))
+
+class ZipArchiveWriter:
+    """
+    Builds a ZIP on disk one member at a time, so receipts can be appended the
+    moment they are rendered and the archive is complete when the batch ends.
+
+    Usage:
+        with ZipArchiveWriter(zip_path) as archive:
+            archive.add_bytes("ONL-0001.pdf", pdf_bytes)
+    """
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self.count = 0
+        self._zip_file = zipfile.ZipFile(zip_path, 'w')
+
+    def add_bytes(self, arcname, data):
+        with timed("zip.add_member"):
+            self._zip_file.writestr(arcname, data, compress_type=_compression_for(arcname))
+        self.count += 1
+
+    def add_file(self, file_path, arcname=None):
+        arcname = arcname or os.path.basename(file_path)
+        with timed("zip.add_member"):
+            self._zip_file.write(file_path, arcname=arcname, compress_type=_compression_for(arcname))
+        self.count += 1
+
+    def close(self):
+        with timed("zip.finalize"):
+            self._zip_file.close()
+
+    def __enter__(self):
+        return self
 
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
\ No newline at end of file
+    def __exit__(self, *exc):
+        self.close()
+        return False
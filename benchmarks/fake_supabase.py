@@ -0,0 +1,342 @@
+# benchmarks/fake_supabase.py
+"""
+In-process stand-in for the parts of Supabase the app uses: PostgREST reads
+and updates on Hope_Trust, and the RPCs the app calls. It is backed by SQLite,
+so the real supabase_client code (supabase-py, the pooled REST session) can be
+exercised end to end without a Supabase project.
+
+Implements:
+    GET   /rest/v1/Hope_Trust     select, eq/neq/gt/gte/lt/lte/is/in filters,
+                                  order, limit, offset, Prefer: count=exact
+    PATCH /rest/v1/Hope_Trust     filtered update, returns the updated rows
+    POST  /rest/v1/rpc/process_and_generate_receipt       -> 'ONL-000001' | 'exists:<no>'
+    POST  /rest/v1/rpc/process_and_generate_receipts_bulk -> one result per row
+    POST  /rest/v1/rpc/mark_report_true                   -> 'success' | 'not_found'
+    POST  /rest/v1/rpc/mark_report_true_bulk              -> receipt numbers now reported
+    POST  /rest/v1/rpc/update_donation_record             -> 'success' | 'not_found'
+
+Every request can be delayed by a random latency and failed with HTTP 503 at
+a configurable rate. Functions listed in `missing_functions` answer like an
+undeployed RPC (HTTP 404, code PGRST202).
+
+Usage:
+    with FakeSupabase(latency_ms=(5, 20), failure_rate=0.01) as fake:
+        streamlit.secrets = {"SUPABASE_URL": fake.url, "SUPABASE_KEY": "offline-key"}
+
+    python benchmarks/fake_supabase.py --port 54321 --latency-ms 5,20
+"""
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+COLUMNS = ("id", "receipt_no", "serial_no", "date", "name", "address", "pan", "amount",
+           "report", "user_email", "entry_mode", "created_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Hope_Trust (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_no TEXT UNIQUE,
+    serial_no INTEGER,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    address TEXT,
+    pan TEXT,
+    amount REAL NOT NULL,
+    report INTEGER NOT NULL DEFAULT 0,
+    user_email TEXT,
+    entry_mode TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hope_trust_donation ON Hope_Trust (name, pan, amount, date);
+CREATE INDEX IF NOT EXISTS hope_trust_report ON Hope_Trust (report, receipt_no);
+"""
+
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class FakeSupabaseError(Exception):
+    """A request the fake cannot serve; reported to the client as HTTP 400."""
+
+class FakeMissingFunction(Exception):
+    """An RPC that is not deployed; reported as PostgREST does, HTTP 404 with code PGRST202."""
+
+class FakeSupabase:
+    """
+    Runs the fake server on a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one.
+        db_path (str): SQLite database path. The default keeps everything in memory.
+        latency_ms (tuple): (min, max) milliseconds added to every request.
+        failure_rate (float): Fraction of requests answered with HTTP 503.
+        seed (int): Seed for latency and failure injection, for repeatable runs.
+        missing_functions (iterable): RPC names to treat as not deployed, e.g. the bulk RPCs.
+    """
+    def __init__(self, port: int = 0, db_path: str = ":memory:", latency_ms: Tuple[float, float] = (0, 0),
+                 failure_rate: float = 0.0, seed: Optional[int] = None, missing_functions: Iterable[str] = ()):
+        self.latency_ms = latency_ms
+        self.missing_functions = set(missing_functions)
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSupabase":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-supabase", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._db.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def reset(self):
+        """Deletes every row, so a repeated run inserts fresh donations instead of hitting 'exists:'."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM Hope_Trust")
+
+    # --- Fault injection ---
+
+    def _inject(self) -> bool:
+        """Sleeps for the injected latency. Returns True if this request should fail."""
+        with self._lock:
+            self.requests += 1
+            delay = self._random.uniform(*self.latency_ms) / 1000
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    # --- Table access ---
+
+    def _where(self, filters: List[Tuple[str, str]]) -> Tuple[str, list]:
+        clauses, args = [], []
+        for column, expression in filters:
+            if column not in COLUMNS:
+                raise FakeSupabaseError(f"unknown column {column}")
+            op, _, value = expression.partition(".")
+            if op in _OPERATORS:
+                clauses.append(f"{column} {_OPERATORS[op]} ?")
+                args.append(_coerce(column, value))
+            elif op == "is":
+                if value == "null":
+                    clauses.append(f"{column} IS NULL")
+                else:
+                    clauses.append(f"{column} = ?")
+                    args.append(1 if value == "true" else 0)
+            elif op == "in":
+                values = [v.strip('"') for v in value.strip("()").split(",") if v]
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                args.extend(_coerce(column, v) for v in values)
+            else:
+                raise FakeSupabaseError(f"unsupported operator {op}")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def select(self, params: List[Tuple[str, str]], count: bool) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        options = {k: v for k, v in params if k in ("select", "order", "limit", "offset")}
+        columns = [c.strip() for c in options.get("select", "*").split(",")]
+        if columns == ["*"]:
+            columns = list(COLUMNS)
+        if any(c not in COLUMNS for c in columns):
+            raise FakeSupabaseError(f"unknown column in select {columns}")
+        where, args = self._where([(k, v) for k, v in params if k not in options])
+
+        order = ""
+        if "order" in options:
+            column, _, direction = options["order"].partition(".")
+            if column not in COLUMNS:
+                raise FakeSupabaseError(f"unknown order column {column}")
+            order = f" ORDER BY {column} {'DESC' if direction.startswith('desc') else 'ASC'}"
+        limit = f" LIMIT {int(options.get('limit', -1))} OFFSET {int(options.get('offset', 0))}"
+
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(columns)} FROM Hope_Trust{where}{order}{limit}", args).fetchall()
+            total = self._db.execute(f"SELECT COUNT(*) FROM Hope_Trust{where}", args).fetchone()[0] if count else None
+        return [_to_json(row) for row in rows], total
+
+    def update(self, params: List[Tuple[str, str]], values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if not values or any(c not in COLUMNS or c == "id" for c in values):
+            raise FakeSupabaseError(f"invalid update columns {list(values)}")
+        where, args = self._where(params)
+        assignments = ", ".join(f"{c} = ?" for c in values)
+        with self._lock, self._db:
+            ids = [r[0] for r in self._db.execute(f"SELECT id FROM Hope_Trust{where}", args)]
+            if ids:
+                self._db.execute(f"UPDATE Hope_Trust SET {assignments} WHERE id IN ({', '.join('?' * len(ids))})",
+                                 [_coerce(c, v) for c, v in values.items()] + ids)
+            rows = self._db.execute(f"SELECT * FROM Hope_Trust WHERE id IN ({', '.join('?' * len(ids))})", ids).fetchall()
+        return [_to_json(row) for row in rows]
+
+    # --- RPCs ---
+
+    def _insert_donation(self, args: Dict[str, Any]) -> str:
+        """Body of process_and_generate_receipt; the caller holds the lock and transaction."""
+        key = (args["p_name"], args["p_pan"], float(args["p_amount"]), args["p_date"])
+        existing = self._db.execute(
+            "SELECT receipt_no FROM Hope_Trust WHERE name = ? AND pan = ? AND amount = ? AND date = ?", key
+        ).fetchone()
+        if existing:
+            return f"exists:{existing[0]}"
+        cursor = self._db.execute(
+            "INSERT INTO Hope_Trust (serial_no, date, name, address, pan, amount, user_email, entry_mode, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
+            (args.get("p_serial_no"), args["p_date"], args["p_name"], args.get("p_address"), args["p_pan"],
+             float(args["p_amount"]), args.get("p_user_email"), args.get("p_entry_mode"))
+        )
+        receipt_no = f"ONL-{cursor.lastrowid:06d}"
+        self._db.execute("UPDATE Hope_Trust SET receipt_no = ? WHERE id = ?", (receipt_no, cursor.lastrowid))
+        return receipt_no
+
+    def rpc(self, function: str, args: Dict[str, Any]) -> Any:
+        if function in self.missing_functions:
+            raise FakeMissingFunction(function)
+        with self._lock, self._db:
+            if function == "process_and_generate_receipt":
+                return self._insert_donation(args)
+            if function == "process_and_generate_receipts_bulk":
+                results = []
+                for row in args["p_rows"]:
+                    try:
+                        results.append(self._insert_donation(row))
+                    except (KeyError, ValueError, sqlite3.Error) as e:
+                        results.append(f"error:{e}")
+                return results
+            if function == "mark_report_true":
+                cursor = self._db.execute("UPDATE Hope_Trust SET report = 1 WHERE receipt_no = ?", (args["p_receipt_no"],))
+                return "success" if cursor.rowcount else "not_found"
+            if function == "mark_report_true_bulk":
+                receipt_nos = list(args["p_receipt_nos"])
+                placeholders = ", ".join("?" * len(receipt_nos))
+                found = [r[0] for r in self._db.execute(
+                    f"SELECT receipt_no FROM Hope_Trust WHERE receipt_no IN ({placeholders})", receipt_nos)]
+                self._db.execute(f"UPDATE Hope_Trust SET report = 1 WHERE receipt_no IN ({placeholders})", receipt_nos)
+                return found
+            if function == "update_donation_record":
+                cursor = self._db.execute(
+                    "UPDATE Hope_Trust SET date = ?, name = ?, amount = ?, address = ?, pan = ? WHERE receipt_no = ?",
+                    (args["p_date"], args["p_name"], float(args["p_amount"]), args["p_address"], args["p_pan"],
+                     args["p_receipt_no"])
+                )
+                return "success" if cursor.rowcount else "not_found"
+        raise FakeMissingFunction(function)
+
+def _coerce(column: str, value: Any) -> Any:
+    if column == "report":
+        return 1 if value in (True, "true", 1) else 0
+    if column == "amount":
+        return float(value)
+    return value
+
+def _to_json(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    if "report" in record:
+        record["report"] = bool(record["report"])
+    return record
+
+def _make_handler(fake: FakeSupabase):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self) -> Any:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def _handle(self, method: str):
+            url = urlparse(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            body = self._body() if method != "GET" else None
+            if fake._inject():
+                self._send(503, {"message": "injected failure"})
+                return
+            try:
+                if url.path == "/rest/v1/Hope_Trust" and method == "GET":
+                    rows, total = fake.select(params, "count=exact" in (self.headers.get("Prefer") or ""))
+                    headers = {}
+                    if total is not None:
+                        headers["Content-Range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+                    self._send(200, rows, headers)
+                elif url.path == "/rest/v1/Hope_Trust" and method == "PATCH":
+                    self._send(200, fake.update(params, body))
+                elif url.path.startswith("/rest/v1/rpc/") and method == "POST":
+                    self._send(200, fake.rpc(url.path.rsplit("/", 1)[1], body))
+                else:
+                    self._send(404, {"message": f"{method} {url.path} is not implemented by the fake"})
+            except FakeMissingFunction as e:
+                self._send(404, {"code": "PGRST202", "message": f"Could not find the function public.{e} in the schema cache"})
+            except (FakeSupabaseError, KeyError, ValueError, sqlite3.Error) as e:
+                self._send(400, {"message": str(e)})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def do_POST(self):
+            self._handle("POST")
+
+    return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Supabase stand-in backed by SQLite.")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db", default=":memory:", help="SQLite database path (default: in memory).")
+    parser.add_argument("--latency-ms", default="0,0", help="Injected latency range, e.g. 5,20.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests failed with HTTP 503.")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--missing-function", action="append", default=[],
+                        help="Answer this RPC as not deployed (repeatable), e.g. process_and_generate_receipts_bulk.")
+    args = parser.parse_args(argv)
+
+    low, _, high = args.latency_ms.partition(",")
+    fake = FakeSupabase(port=args.port, db_path=args.db, latency_ms=(float(low), float(high or low)),
+                        failure_rate=args.failure_rate, seed=args.seed,
+                        missing_functions=args.missing_function).start()
+    print(f"✅ Fake Supabase listening on {fake.url} (set SUPABASE_URL to this in .streamlit/secrets.toml)")
+    try:
+        fake._thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks the receipt pipeline stage by stage, fully offline.
+
+Stages:
+    pdf_render      create_receipt_pdf, one call per receipt
+    validators      validate_date/name/amount/pan over N rows
+    validators_batch validate_donor_columns over an N-row DataFrame
+    excel_read      pd.read_excel of a generated upload
+    excel_stream    iter_excel_chunks over the same upload (latency per chunk)
+    excel_page      excel_upload_page end to end (read, validate, RPC stub, render, ZIP)
+    zip_<n>         create_zip_from_directory over n receipt PDFs
+
+Each stage reports items/sec, p50/p99 latency and peak traced memory.
+
+By default the Supabase layer is replaced by an in-memory stub. With
+--backend fake the real client code talks HTTP to a local FakeSupabase
+server instead, with optional injected latency and failures, so network
+round trips show up in the excel_page figures.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.15
+    python benchmarks/run_benchmarks.py --backend fake --latency-ms 5,20 --stages excel_page
+
+With --baseline the script exits with status 1 if any stage regressed by
+more than the threshold (throughput down, or p99 latency / peak memory up).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import install_offline_stubs, reset_supabase_stub, stubbed_streamlit
+from fake_supabase import FakeSupabase
+
+def _percentile(latencies: List[float], pct: float) -> float:
+    ordered = sorted(latencies)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def _run_stage(run: Callable[[], List[float]], items: int) -> Dict[str, float]:
+    """
+    Runs a stage twice: once timed, once under tracemalloc for peak memory, so
+    tracing overhead does not distort the latency figures.
+    `run` returns the latency samples (seconds) it collected.
+    """
+    start = time.perf_counter()
+    latencies = run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": items,
+        "seconds": round(elapsed, 4),
+        "items_per_sec": round(items / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+    }
+
+def _timed(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def _sample_receipts(count: int, prefix: str):
+    from pdf_generator import ReceiptData
+    amounts = [500, 1000, 2500, 5000, 10000, 150000]
+    return [
+        ReceiptData(
+            receipt_no=f"{prefix}-{i:06d}",
+            date="15-08-2024",
+            name=f"DONOR NUMBER {i}",
+            amount=float(amounts[i % len(amounts)]),
+            address="12, GANDHI STREET, CHENNAI",
+            pan="ABCDE1234F",
+        )
+        for i in range(count)
+    ]
+
+def _excel_bytes(rows: int) -> bytes:
+    import pandas as pd
+    df = pd.DataFrame({
+        "S.NO": [str(i + 1) for i in range(rows)],
+        "D.O.D": ["15.08.24"] * rows,
+        "DONOR NAME": [f"DONOR NUMBER {i}" for i in range(rows)],
+        "AMOUNT": [str(500 + (i % 20) * 250) for i in range(rows)],
+        "RECEIPT NUMBER": [""] * rows,
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+# --- Stages ---
+
+def bench_pdf_render(work_dir: str, receipts: int) -> Dict[str, float]:
+    from pdf_generator import create_receipt_pdf
+    runs = iter(range(2))
+
+    def run():
+        # Fresh receipt numbers every pass so the render cache never hits.
+        batch = _sample_receipts(receipts, f"BENCH{next(runs)}")
+        out_dir = tempfile.mkdtemp(dir=work_dir)
+        return [_timed(lambda d=data: create_receipt_pdf(d, out_dir)) for data in batch]
+    return _run_stage(run, receipts)
+
+def bench_validators(rows: int) -> Dict[str, float]:
+    from validators import validate_date, validate_name, validate_amount, validate_pan
+    samples = [("15.08.24", f"DONOR {i}", str(500 + i % 1000), "ABCDE1234F" if i % 3 else "") for i in range(rows)]
+
+    def run():
+        latencies = []
+        for date_str, name, amount, pan in samples:
+            start = time.perf_counter()
+            validate_date(date_str)
+            validate_name(name)
+            validate_amount(amount)
+            validate_pan(pan)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    return _run_stage(run, rows)
+
+def bench_validators_batch(rows: int) -> Dict[str, float]:
+    import pandas as pd
+    from validators import validate_donor_columns
+    df = pd.DataFrame({
+        "Date": ["15.08.24"] * rows,
+        "Name": [f"DONOR {i}" for i in range(rows)],
+        "Amount": [str(500 + i % 1000) for i in range(rows)],
+        "Pan": ["ABCDE1234F" if i % 3 else "" for i in range(rows)],
+    }, dtype=str)
+    return _run_stage(lambda: [_timed(lambda: validate_donor_columns(df))], rows)
+
+def bench_excel_read(rows: int, repeats: int) -> Dict[str, float]:
+    import pandas as pd
+    payload = _excel_bytes(rows)
+
+    def run():
+        return [_timed(lambda: pd.read_excel(io.BytesIO(payload), dtype=str)) for _ in range(repeats)]
+    return _run_stage(run, rows * repeats)
+
+def bench_excel_stream(rows: int, repeats: int) -> Dict[str, float]:
+    from excel_reader import iter_excel_chunks
+    payload = _excel_bytes(rows)
+
+    def run():
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for chunk in iter_excel_chunks(io.BytesIO(payload)):
+                latencies.append(time.perf_counter() - start)
+                start = time.perf_counter()
+        return latencies
+    return _run_stage(run, rows * repeats)
+
+def bench_excel_page(work_dir: str, rows: int, repeats: int, fake: FakeSupabase = None) -> Dict[str, float]:
+    import excel_ui
+    from duplicate_index import reset_duplicate_index
+    payload = _excel_bytes(rows)
+
+    def run_once():
+        if fake:
+            fake.reset()
+        else:
+            reset_supabase_stub()
+        # Otherwise later runs would skip every row as a duplicate of the first run's inserts.
+        reset_duplicate_index()
+        session_state = {"current_pdf_session_dir": tempfile.mkdtemp(dir=work_dir), "user_email": "bench@example.org"}
+        with stubbed_streamlit(excel_ui, uploaded_file=io.BytesIO(payload),
+                               pressed={"Process Excel File"}, session_state=session_state) as st:
+            excel_ui.excel_upload_page()
+        if st.errors:
+            raise RuntimeError(f"excel_upload_page reported errors: {st.errors}")
+
+    def run():
+        return [_timed(run_once) for _ in range(repeats)]
+    return _run_stage(run, rows * repeats)
+
+def bench_zip(work_dir: str, files: int, repeats: int) -> Dict[str, float]:
+    from pdf_generator import render_receipt_bytes, receipt_filename
+    from zip_utils import create_zip_from_directory
+    sample = _sample_receipts(1, "ZIP")[0]
+    pdf_bytes = render_receipt_bytes(sample)
+    source_dir = tempfile.mkdtemp(dir=work_dir)
+    for i in range(files):
+        with open(os.path.join(source_dir, receipt_filename(f"ZIP-{i:06d}")), "wb") as f:
+            f.write(pdf_bytes)
+
+    def run():
+        return [_timed(lambda: create_zip_from_directory(source_dir)) for _ in range(repeats)]
+    try:
+        return _run_stage(run, files * repeats)
+    finally:
+        shutil.rmtree(source_dir, ignore_errors=True)
+
+# --- Regression gate ---
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Returns a human-readable line for every metric that regressed past the threshold."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        if previous["items_per_sec"] and current["items_per_sec"] < previous["items_per_sec"] * (1 - threshold):
+            regressions.append(f"{stage}: throughput {current['items_per_sec']}/s vs baseline {previous['items_per_sec']}/s")
+        for metric in ("p99_ms", "peak_mb"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{stage}: {metric} {current[metric]} vs baseline {previous[metric]}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the receipt pipeline.")
+    parser.add_argument("--receipts", type=int, default=200, help="Receipts rendered in the pdf_render stage.")
+    parser.add_argument("--validator-rows", type=int, default=100_000, help="Rows run through the validators.")
+    parser.add_argument("--excel-rows", type=int, default=1000, help="Rows in the generated Excel upload.")
+    parser.add_argument("--zip-sizes", default="10,1000,10000", help="Comma-separated receipt counts to ZIP.")
+    parser.add_argument("--repeats", type=int, default=3, help="Repetitions for whole-batch stages.")
+    parser.add_argument("--stages", default="", help="Comma-separated subset of stages to run (e.g. pdf_render,zip).")
+    parser.add_argument("--output", help="Write results JSON to this path.")
+    parser.add_argument("--save-baseline", help="Write results JSON as the new baseline.")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON and fail on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%).")
+    parser.add_argument("--backend", choices=("stub", "fake"), default="stub",
+                        help="Supabase layer: in-memory stub, or the real client against a local fake server.")
+    parser.add_argument("--latency-ms", default="0,0", help="Fake backend: injected latency range per request, e.g. 5,20.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake backend: fraction of requests failed with 503.")
+    args = parser.parse_args(argv)
+
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    output_paths = [os.path.abspath(p) for p in (args.output, args.save_baseline) if p]
+    selected = {s.strip() for s in args.stages.split(",") if s.strip()}
+
+    def wanted(stage: str) -> bool:
+        return not selected or stage in selected or stage.split("_")[0] in selected
+
+    work_dir = tempfile.mkdtemp(prefix="ht_bench_")
+    original_cwd = os.getcwd()
+    os.chdir(work_dir)  # config creates its output folder relative to the CWD
+    fake = None
+    if args.backend == "fake":
+        low, _, high = args.latency_ms.partition(",")
+        fake = FakeSupabase(latency_ms=(float(low), float(high or low)), failure_rate=args.failure_rate, seed=0).start()
+    try:
+        install_offline_stubs(supabase_url=fake.url if fake else None)
+        stages = {}
+        if wanted("pdf_render"):
+            stages["pdf_render"] = bench_pdf_render(work_dir, args.receipts)
+        if wanted("validators"):
+            stages["validators"] = bench_validators(args.validator_rows)
+        if wanted("validators_batch"):
+            stages["validators_batch"] = bench_validators_batch(args.validator_rows)
+        if wanted("excel_read"):
+            stages["excel_read"] = bench_excel_read(args.excel_rows, args.repeats)
+        if wanted("excel_stream"):
+            stages["excel_stream"] = bench_excel_stream(args.excel_rows, args.repeats)
+        if wanted("excel_page"):
+            stages["excel_page"] = bench_excel_page(work_dir, args.excel_rows, args.repeats, fake)
+        for size in (int(s) for s in args.zip_sizes.split(",") if s.strip()):
+            if wanted(f"zip_{size}"):
+                stages[f"zip_{size}"] = bench_zip(work_dir, size, args.repeats)
+    finally:
+        if fake:
+            fake.stop()
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": args.backend,
+            "latency_ms": args.latency_ms if fake else None,
+            "failure_rate": args.failure_rate if fake else None,
+        },
+        "stages": stages,
+    }
+
+    print(f"{'stage':<14}{'items':>9}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for stage, r in stages.items():
+        print(f"{stage:<14}{r['items']:>9}{r['items_per_sec']:>12}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['peak_mb']:>10}")
+
+    for path in output_paths:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {baseline_path}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
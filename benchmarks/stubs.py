@@ -0,0 +1,163 @@
+# benchmarks/stubs.py
+"""
+Offline stand-ins so the receipt pipeline can be benchmarked without a
+Supabase project or a running Streamlit server.
+
+install_offline_stubs() must run before anything from app/ is imported.
+"""
+import itertools
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_ROOT, "app")
+
+OFFLINE_SECRETS = {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_KEY": "offline-benchmark-key",
+    "PDF_RENDER_WORKERS": 1,
+}
+
+# --- Supabase client stub ---
+_receipt_counter = itertools.count(1)
+_known_donations = {}
+
+def reset_supabase_stub():
+    """Forgets inserted donations. Receipt numbers keep increasing across resets."""
+    _known_donations.clear()
+
+def process_donor_and_get_receipt_no(date, name, amount, pan, address, user_email, entry_mode, serial_no=None):
+    key = (name.upper(), pan.upper(), float(amount), date)
+    if key in _known_donations:
+        return True, f"exists:{_known_donations[key]}"
+    receipt_no = f"ONL-{next(_receipt_counter):06d}"
+    _known_donations[key] = receipt_no
+    return True, receipt_no
+
+def process_donors_bulk(rows, user_email, entry_mode, chunk_size=None):
+    return [process_donor_and_get_receipt_no(user_email=user_email, entry_mode=entry_mode, **row) for row in rows]
+
+def update_donation_record(receipt_no, date, name, amount, pan, address):
+    return True, None
+
+def set_receipt_generated_flag(receipt_no: str) -> bool:
+    return True
+
+def set_receipt_generated_flags(receipt_nos, chunk_size=None):
+    return {receipt_no: True for receipt_no in receipt_nos}
+
+def fetch_reported_receipt_nos(receipt_nos, chunk_size=None):
+    return {receipt_no.strip() for receipt_no in receipt_nos}
+
+def direct_api_test() -> list:
+    return []
+
+def count_missing_receipts():
+    return True, 0
+
+def iter_missing_receipts(page_size=None, columns=None):
+    return iter(())
+
+def fetch_missing_receipts(limit=None):
+    return True, []
+
+def refresh_duplicate_index(force=False):
+    return False
+
+def get_receipt_by_number(receipt_no: str):
+    return True, None
+
+def update_receipt_details(receipt_no: str, updated_data):
+    return True, "Record updated successfully."
+
+def _build_supabase_client_stub() -> types.ModuleType:
+    stub = types.ModuleType("supabase_client")
+    for name in ("process_donor_and_get_receipt_no", "process_donors_bulk", "update_donation_record",
+                 "set_receipt_generated_flag", "set_receipt_generated_flags", "fetch_reported_receipt_nos",
+                 "direct_api_test",
+                 "count_missing_receipts", "iter_missing_receipts", "fetch_missing_receipts",
+                 "get_receipt_by_number", "update_receipt_details", "refresh_duplicate_index"):
+        setattr(stub, name, globals()[name])
+    return stub
+
+# --- Streamlit page stub ---
+class _Noop:
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class StreamlitStub:
+    """
+    Minimal replacement for the `st` name inside a page module. Buttons and
+    checkboxes whose label is in `pressed` return True, the file uploader
+    returns `uploaded_file`, and everything else is a no-op.
+    """
+    def __init__(self, uploaded_file=None, pressed=(), session_state=None):
+        self.uploaded_file = uploaded_file
+        self.pressed = set(pressed)
+        self.session_state = session_state if session_state is not None else {}
+        self.errors = []
+
+    def file_uploader(self, *args, **kwargs):
+        return self.uploaded_file
+
+    def button(self, label, *args, **kwargs):
+        return label in self.pressed
+
+    def checkbox(self, label, value=False, *args, **kwargs):
+        return label in self.pressed or value
+
+    def error(self, message, *args, **kwargs):
+        self.errors.append(message)
+
+    def columns(self, spec, *args, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [_Noop() for _ in range(count)]
+
+    def __getattr__(self, name):
+        return _Noop()
+
+@contextmanager
+def stubbed_streamlit(module, **kwargs):
+    """Temporarily swaps a page module's `st` for a StreamlitStub."""
+    original = module.st
+    module.st = StreamlitStub(**kwargs)
+    try:
+        yield module.st
+    finally:
+        module.st = original
+
+def install_offline_stubs(supabase_url: str = None):
+    """
+    Points imports at the app directory and replaces secrets and the Supabase layer.
+    With `supabase_url` (e.g. a FakeSupabase server) the real Supabase client
+    code is kept and pointed at that URL instead of being stubbed out.
+    """
+    for path in (REPO_ROOT, APP_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    import streamlit
+    streamlit.secrets = dict(OFFLINE_SECRETS, **({"SUPABASE_URL": supabase_url} if supabase_url else {}))
+
+    import config
+    # config resolves assets next to sys.argv[0]; use the repo's copy instead.
+    assets_dir = os.path.join(REPO_ROOT, "ASSETS")
+    config.LOGO_PATH = os.path.join(assets_dir, "LOGO.png")
+    config.SIGNATURE_PATH = os.path.join(assets_dir, "SIGNU.png")
+    config.QR_CODE_PATH = os.path.join(assets_dir, "qr.png")
+    config.FONT_PATH = os.path.join(assets_dir, "Poppins-Regular.ttf")
+    config.FONT_BOLD_PATH = os.path.join(assets_dir, "Poppins-Bold.ttf")
+
+    if not supabase_url:
+        sys.modules["supabase_client"] = _build_supabase_client_stub()
@@ -0,0 +1,65 @@
+-- sql/bulk_rpcs.sql
+-- Bulk RPCs called by app/supabase_client.py. Run once in the Supabase SQL
+-- editor. While a function is missing the app falls back to its per-row RPC.
+--
+-- process_and_generate_receipts_bulk wraps the existing per-row function, so
+-- duplicate detection and receipt numbering stay in one place. Its casts
+-- assume process_and_generate_receipt takes (text, text, text, numeric, date,
+-- integer, text, text); match them to the actual parameter types if those differ.
+
+-- One result per element of p_rows, in order: the new receipt number,
+-- 'exists:<receipt_no>' or 'error:<message>'. Each row runs in its own
+-- subtransaction, so one bad row does not roll back the others.
+create or replace function process_and_generate_receipts_bulk(
+    p_rows jsonb,
+    p_user_email text,
+    p_entry_mode text
+) returns text[]
+language plpgsql
+as $$
+declare
+    r jsonb;
+    results text[] := '{}';
+begin
+    for r in select value from jsonb_array_elements(p_rows) with ordinality order by ordinality loop
+        begin
+            results := results || process_and_generate_receipt(
+                p_name       => r->>'p_name',
+                p_address    => r->>'p_address',
+                p_pan        => r->>'p_pan',
+                p_amount     => (r->>'p_amount')::numeric,
+                p_date       => (r->>'p_date')::date,
+                p_serial_no  => (r->>'p_serial_no')::integer,
+                p_user_email => coalesce(r->>'p_user_email', p_user_email),
+                p_entry_mode => coalesce(r->>'p_entry_mode', p_entry_mode)
+            )::text;
+        exception when others then
+            results := results || ('error:' || sqlerrm);
+        end;
+    end loop;
+    return results;
+end;
+$$;
+
+-- Sets report = true on every receipt in p_receipt_nos and returns each of
+-- them that exists, including ones that were already reported, so the caller
+-- can treat every returned number as done.
+create or replace function mark_report_true_bulk(
+    p_receipt_nos text[]
+) returns setof text
+language plpgsql
+as $$
+begin
+    update "Hope_Trust"
+       set report = true
+     where receipt_no = any(p_receipt_nos)
+       and report is distinct from true;
+    return query
+        select receipt_no::text
+          from "Hope_Trust"
+         where receipt_no = any(p_receipt_nos);
+end;
+$$;
+
+-- Makes PostgREST pick up the new functions without a restart.
+notify pgrst, 'reload schema';
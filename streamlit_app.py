@@ -4,21 +4,26 @@ import sys
 from datetime import datetime
 import base64
 
-# Add the 'app' directory to the Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+# Add the 'app' directory to the Python path. Modules under app/ import each
+# other by bare name (`config`, `supabase_client`), never as `app.<name>`, so
+# each is loaded once and its caches, indexes and connections are shared.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 # === Import config elements including BASE_PDF_OUTPUT_DIR ===
-from app.config import (
+from config import (
     get_supabase_client, APP_TITLE_PREFIX, LOGO_PATH, BASE_PDF_OUTPUT_DIR,
     UI_PRIMARY_COLOR, UI_PRIMARY_COLOR_DARK, UI_NEUTRAL_WHITE, UI_NEUTRAL_BLACK,
     UI_GREY_LIGHTEST, UI_GREY_LIGHT, UI_GREY_MEDIUM, UI_GREY_DARK, UI_GREY_DARKER,
     UI_SUCCESS_GREEN, UI_ERROR_RED, UI_WARNING_ORANGE, UI_TEXT_ON_PRIMARY
 )
 
-from app.excel_ui import excel_upload_page
-from app.recovery_ui import recovery_page
-from app.main_ui import ui_form_page
-from app.update_ui import update_page
+from excel_ui import excel_upload_page
+from recovery_ui import recovery_page
+from main_ui import ui_form_page
+from update_ui import update_page
+from admin_ui import performance_page
+from db_outbox import start_outbox_drainer
+from supabase_client import start_replica_sync
 
 #
 # === Set page configuration at the very top ===
@@ -29,6 +34,11 @@ st.set_page_config(
     initial_sidebar_state="auto"
 )
 
+# Retry any DB writes left in the outbox by earlier runs.
+start_outbox_drainer()
+# Keep the local read replica of Hope_Trust in sync.
+start_replica_sync()
+
 # === Function to inject custom CSS ===
 def inject_custom_css():
     st.markdown(f"""
@@ -286,6 +296,10 @@ def mode_selection_page():
             with col1:
                 if st.button("⚙️ User Management", key="btn_user_management", use_container_width=True):
                     st.info("User Management page (Coming Soon!)", icon="⚙️")
+            with col2:
+                if st.button("⏱️ Performance", key="btn_performance", use_container_width=True):
+                    st.session_state['mode'] = 'performance'
+                    st.rerun()
 
     st.markdown("---")
     if st.button("Logout"):
@@ -332,6 +346,8 @@ if __name__ == "__main__":
             page_title = "Recover Missing Receipts"
         elif st.session_state['mode'] == 'update':
             page_title = "Update Receipt Details"
+        elif st.session_state['mode'] == 'performance':
+            page_title = "Performance"
         else:
             page_title = "Dashboard"
         
@@ -346,5 +362,7 @@ if __name__ == "__main__":
             recovery_page()
         elif st.session_state['mode'] == 'update':
             update_page()
+        elif st.session_state['mode'] == 'performance' and st.session_state.get('selected_role') == 'admin':
+            performance_page()
         else:
             mode_selection_page()
\ No newline at end of file
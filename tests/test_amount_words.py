@@ -0,0 +1,44 @@
+# tests/test_amount_words.py
+import os
+import sys
+
+import pytest
+
+num2words = pytest.importorskip("num2words").num2words
+
+# The app's modules import each other by bare name, as streamlit_app.py arranges.
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, 'app'))
+
+from amount_words import MAX_AMOUNT, amount_to_words, amounts_to_words
+
+def _boundary_samples():
+    """Values either side of every lakh step below ten crore and every crore step, plus the limits."""
+    steps = [multiple * 10 ** 5 for multiple in range(1, 1000)]
+    steps += [multiple * 10 ** 7 for multiple in range(1, (MAX_AMOUNT + 1) // 10 ** 7)]
+    samples = {0, 1, MAX_AMOUNT}
+    for step in steps:
+        samples.update((step - 1, step, step + 1))
+    return sorted(samples)
+
+def test_matches_num2words_up_to_ten_lakh():
+    mismatches = [n for n in range(1_000_001) if amount_to_words.__wrapped__(n) != num2words(n, lang='en_IN')]
+    assert mismatches == []
+
+def test_matches_num2words_at_lakh_and_crore_boundaries():
+    mismatches = [n for n in _boundary_samples() if amount_to_words(n) != num2words(n, lang='en_IN')]
+    assert mismatches == []
+
+def test_negative_amounts():
+    for amount in (-1, -100000, -12345678):
+        assert amount_to_words(amount) == num2words(amount, lang='en_IN')
+
+def test_overflow_like_num2words():
+    with pytest.raises(OverflowError):
+        amount_to_words(MAX_AMOUNT + 1)
+    with pytest.raises(OverflowError):
+        num2words(MAX_AMOUNT + 1, lang='en_IN')
+
+def test_amounts_to_words_truncates_like_int():
+    assert amounts_to_words(["1500.75", 1500, 99.9]) == [
+        num2words(1500, lang='en_IN'), num2words(1500, lang='en_IN'), num2words(99, lang='en_IN')
+    ]